@@ -28,21 +28,97 @@
 #
 # FizzBuzz.py -a racers -v false -m 15000
 # FizzBuzz.py --algo=racers --verbose=false --max=15000
+#
+# Ranges can start anywhere, however large; IE 10 million numbers from 10^15:
+#
+# FizzBuzz.py --start=1000000000000000 --count=10000000 -v false
 
 
-from time import perf_counter
+from time import perf_counter, perf_counter_ns, process_time_ns, thread_time_ns, sleep
+from collections import deque, Counter, OrderedDict
+from contextlib import nullcontext
+import importlib.util
+import itertools
+import math
+import gc
+import os
 import sys
-import getopt
-import locale
+
+# The resource module is POSIX only; peak RSS falls back to /proc or zero
+try:
+   import resource
+except ImportError:
+   resource = None
+
+# Everything but the basics (NumPy, asyncio, process pools, profilers,
+# JSON, CSV, statistics, tracing, option parsing and so on) is imported
+# where it is first needed, so importing this module stays cheap.
+# NumPy is optional; the Vectorized algorithm is only offered if present.
 
 # Global constants, can be modified by command line parameter
 MAX_NUMBERS     = 100
+START_NUMBER    = 1       # First number of the range; MAX_NUMBERS is its size
 VERBOSE         = True
 ALGO_REQUESTED  = "*"
 RECURSION_LIMIT = 10000
-
-# Small timer class to handle performance timing
+STREAM          = False
+CHUNK_SIZE      = 300000  # Streaming window; a multiple of 15 (and 100)
+WORKERS         = []      # Worker counts for sharded runs, IE [1, 2, 4, 8]
+ANNOUNCE        = True    # Print "(now executing...)"; off in pool workers
+COMPACT         = False   # Store results in a FizzBuzzResult instead of a list
+OUTPUT_FILE     = ""      # Write results to this file instead of stdout
+OUTPUT_FORMAT   = "indexed" # "indexed" ([n] value) or "plain" (value only)
+BENCHMARK       = False   # Repeat each algorithm and rank on statistics
+WARMUP          = 1       # Untimed runs before measuring
+REPEAT          = 0       # Timed runs; 0 calibrates to fill BENCH_SECONDS
+BENCH_SECONDS   = 1.0     # Calibration target per algorithm
+SIGNIFICANCE    = 0.05    # p-value below which two rankings differ
+VERIFY          = False   # Check each algorithm's output against the reference
+QUERY           = None    # (start, stop) window to look up instead of running
+MEMORY          = False   # Record peak memory, allocations and GC per algorithm
+RULES           = ((3, "Fizz"), (5, "Buzz"))  # (divisor, label) pairs for Rules
+SERVE_PORT      = None    # Serve ranges over HTTP on this localhost port
+SERVE_CHUNK     = 15360   # Numbers per streamed HTTP chunk (a multiple of 15)
+LOAD_CLIENTS    = 0       # Run the built-in load generator with this many clients
+LOAD_DELAY      = 0.0     # Seconds each load client waits between reads
+ISOLATE         = False   # Run each algorithm in a fresh interpreter
+PIN_CPU         = None    # CPU to pin isolated runs to
+EXPORT_FILE     = ""      # Save results here; .csv for CSV, anything else JSON
+COMPARE_FILE    = ""      # Baseline JSON to check for regressions against
+THRESHOLD       = 10.0    # Percent slower (or bigger) that counts as a regression
+SWEEP           = None    # (low, high, factor) range sizes for a scaling sweep
+SWEEP_REPEAT    = 3       # Runs per size in a sweep; the fastest is kept
+SWEEP_DATA      = ""      # Save sweep points and fits here as CSV
+PROFILE         = ""      # "phases", "cprofile" or "sample"; empty is off
+PROFILE_TOP     = 10      # Entries shown by cProfile and the sampler
+UNROLL          = 90      # Block size for the Generated algorithm
+STORE_FILE      = ""      # Store results in this memory-mapped code file
+GC_MODE         = ""      # "freeze" or "disable" the cyclic GC while measuring
+BATCH_FILE      = ""      # Run the job matrix in this JSON file
+CACHE_SIZE      = 0       # MB of computed ranges the server keeps; 0 for none
+CACHE_BLOCK     = 15360   # Numbers per cached block
+CHECKPOINT_FILE = ""      # Save streaming progress here, to carry on after a crash
+CHECKPOINT_EVERY = 10.0   # Seconds between checkpoints
+RESUME          = False   # Carry on from CHECKPOINT_FILE instead of starting over
+
+# Options that shape a run, handed to isolated worker processes
+OPTIONS = ("MAX_NUMBERS", "START_NUMBER", "VERBOSE", "RECURSION_LIMIT", "STREAM", "CHUNK_SIZE",
+           "WORKERS", "COMPACT", "OUTPUT_FILE", "OUTPUT_FORMAT", "BENCHMARK",
+           "WARMUP", "REPEAT", "BENCH_SECONDS", "VERIFY", "MEMORY", "RULES",
+           "PROFILE", "PROFILE_TOP", "CHECKPOINT_FILE", "CHECKPOINT_EVERY", "UNROLL",
+           "STORE_FILE", "GC_MODE")
+
+# Result labels by code (0 is the number itself), and the code of n by n%15
+LABELS          = (None, "Fizz", "Buzz", "FizzBuzz")
+PATTERN_CODES   = bytes([3, 0, 0, 1, 0, 2, 1, 0, 0, 1, 2, 0, 1, 0, 0])
+
+# Small timer class to handle performance timing.  Counts integer
+# nanoseconds, and keeps the process and thread CPU time alongside the wall
+# clock time.  The wall clock is read last on start() and first on stop(),
+# so it brackets only the work; the cost of an empty start()/stop() pair,
+# calibrated once, is subtracted from it, which matters for tiny runs.
 class Timer():
+   overhead = None   # Calibrated ns of an empty start()/stop(), shared
    timeStart = timeStop = timElapsed = 0
    running = False
 
@@ -50,28 +126,861 @@ class Timer():
       self.timeStart=0
       self.timeStop=0
       self.timeElapsed=0
+      self.cpuStart=self.cpuStop=0
+      self.threadStart=self.threadStop=0
       self.running=False
+      if (Timer.overhead is None):
+         Timer.overhead = 0
+         Timer.overhead = self.calibrate()
+
+   # Smallest time an empty start()/stop() pair measures
+   def calibrate(self, rounds=1000):
+      best = None
+      for i in range(rounds):
+         self.start()
+         self.stop()
+         if (best is None or self.timeStop-self.timeStart<best):
+            best = self.timeStop-self.timeStart
+      return(best)
 
    def start(self):
       self.running=True
-      self.timeStart=perf_counter()
+      self.cpuStart=process_time_ns()
+      self.threadStart=thread_time_ns()
+      self.timeStart=perf_counter_ns()
 
    def stop(self):
-      self.timeStop=perf_counter()
+      self.timeStop=perf_counter_ns()
+      self.threadStop=thread_time_ns()
+      self.cpuStop=process_time_ns()
       self.running=False
 
+   # Wall clock seconds, less the timer's own overhead
    def elapsed(self):
-      if (self.timeStop<self.timeStart):
-         self.timeElapsed = perf_counter() - self.timeStart
+      if (self.running):
+         self.timeElapsed = (perf_counter_ns()-self.timeStart)/1e9
       else:
-         self.timeElapsed = self.timeStop - self.timeStart
+         self.timeElapsed = max(self.timeStop-self.timeStart-Timer.overhead, 0)/1e9
       return (self.timeElapsed)
 
+   # CPU seconds used by the whole process (all threads)
+   def cpu(self):
+      return((self.cpuStop-self.cpuStart)/1e9)
+
+   # CPU seconds used by the calling thread
+   def threadCpu(self):
+      return((self.threadStop-self.threadStart)/1e9)
+
    def isRunning(self):
       return(self.running)
 #End of class
 ###########################################################################
 
+# Bulk output.  Results are formatted a block of items at a time with a
+# single join, encoded, and copied into a pre-sized buffer that is written
+# to stdout (or a file) only when full.  That replaces one print() per
+# item with one write() per megabyte or so, which matters a lot at 1M+
+# items and when piping into other tools.  Time spent here is tracked
+# separately so it can be reported apart from the algorithm's own time.
+class Renderer():
+   BLOCK = 65536           # Items formatted per join
+
+   def __init__(self, path="", indexed=True, bufferSize=1<<20):
+      self.indexed = indexed
+      self.buffer = bytearray(bufferSize)
+      self.view = memoryview(self.buffer)
+      self.used = 0
+      self.items = 0
+      self.timer = Timer()
+      self.seconds = 0.0
+      if (path):
+         self.sink = open(path, "ab", buffering=0)
+         self.owned = True
+      else:
+         # Anything already print()ed must go out before our raw writes
+         sys.stdout.flush()
+         self.sink = sys.stdout.buffer
+         self.owned = False
+
+   # Renders items, numbering them from first in indexed format
+   def write(self, items, first=1):
+      self.timer.start()
+      if (isinstance(items, Stamped)):
+         self.put(formatBlock(items, first, self.indexed))
+         self.items+=len(items)
+         items = ()
+      items = iter(items)
+      while (True):
+         block = list(itertools.islice(items, self.BLOCK))
+         if (not block):
+            break
+         self.put(formatBlock(block, first, self.indexed))
+         first+=len(block)
+         self.items+=len(block)
+      self.timer.stop()
+      self.seconds+=self.timer.elapsed()
+
+   def put(self, data):
+      if (self.used+len(data)>len(self.buffer)):
+         self.drain()
+      if (len(data)>=len(self.buffer)):
+         self.sink.write(data)
+      else:
+         self.buffer[self.used:self.used+len(data)] = data
+         self.used+=len(data)
+
+   def drain(self):
+      if (self.used):
+         self.sink.write(self.view[:self.used])
+         self.used = 0
+
+   # Makes everything rendered so far durable and returns the size of the
+   # output file, or None when writing to the console
+   def sync(self):
+      self.drain()
+      if (not self.owned):
+         self.sink.flush()
+         return(None)
+      os.fsync(self.sink.fileno())
+      return(self.sink.tell())
+
+   # Flushes and reports the rendering time, on stderr so that output
+   # piped to another tool is only the results
+   def close(self):
+      self.timer.start()
+      self.drain()
+      if (self.owned):
+         self.sink.close()
+      else:
+         self.sink.flush()
+      self.timer.stop()
+      self.seconds+=self.timer.elapsed()
+      print ("   Rendered "+f'{self.items:n}'+" items in "+f'{self.seconds:<.3f}'+" seconds"+
+             (" to "+self.sink.name if self.owned else "")+".\n", file=sys.stderr)
+      return(self.seconds)
+
+# Plain text rendering of results, one per line, as used for digests
+def plainBytes(items):
+   text = "\n".join(map(str, items))
+   return((text+"\n").encode() if text else b"")
+
+# Renders a block of results as bytes, indexed from first or plain
+def formatBlock(block, first=1, indexed=True):
+   if (isinstance(block, Stamped) and block.indexed==indexed):
+      return(block.data)
+   if (indexed):
+      text = "\n".join(map("[{0}] {1}".format, itertools.count(first), block))
+      return((text+"\n").encode() if text else b"")
+   return(plainBytes(block))
+
+# Returns a Renderer for the output options chosen on the command line
+def openRenderer():
+   return(Renderer(OUTPUT_FILE, OUTPUT_FORMAT=="indexed"))
+
+# Results that are already rendered, as produced by the Stamper algorithm.
+# The bytes are passed through to the output untouched when the format
+# matches; otherwise (and for verify) the lines are decoded back into
+# values, so a Stamped block can stand in for a results list anywhere.
+class Stamped():
+   def __init__(self, data=b"", count=0, indexed=True):
+      self.data = data
+      self.count = count
+      self.indexed = indexed
+
+   def __len__(self):
+      return(self.count)
+
+   def __iter__(self):
+      for line in self.data.split(b"\n")[:self.count]:
+         if (self.indexed):
+            line = line.split(b" ", 1)[1]
+         yield int(line) if line.isdigit() else line.decode()
+
+   def clear(self):
+      self.data = b""
+      self.count = 0
+
+#End of class
+###########################################################################
+
+
+# Phase timing.  Used as "with self.phase(name):" inside an algorithm to
+# time part of it separately.  Phases nest, and time is charged to the
+# innermost one only, so the phases of a run add up to its total.
+class Phase():
+   def __init__(self, owner, name):
+      self.owner = owner
+      self.name = name
+
+   def __enter__(self):
+      now = perf_counter()
+      stack = self.owner.phaseStack
+      if (stack):
+         self.owner.charge(stack[-1][0], now-stack[-1][1])
+      stack.append([self.name, now])
+      return(self)
+
+   def __exit__(self, *exc):
+      now = perf_counter()
+      stack = self.owner.phaseStack
+      name, mark = stack.pop()
+      self.owner.charge(name, now-mark)
+      if (stack):
+         stack[-1][1] = now
+      return(False)
+
+# Sampling profiler.  A background thread looks at what the profiled thread
+# is executing every interval seconds and counts the source lines seen.
+# Unlike cProfile it adds no per-call overhead to the code being measured.
+# The sampler can only run when the GIL is handed over, so the switch
+# interval is shortened to match while sampling.
+class Sampler():
+   def __init__(self, interval=0.001):
+      self.interval = interval
+      self.counts = Counter()
+      self.running = False
+      self.thread = None
+      self.target = None
+      self.switch = sys.getswitchinterval()
+
+   def start(self):
+      import threading
+      self.target = threading.get_ident()
+      self.running = True
+      self.switch = sys.getswitchinterval()
+      sys.setswitchinterval(self.interval)
+      self.thread = threading.Thread(target=self.run, daemon=True)
+      self.thread.start()
+
+   def run(self):
+      while (True):
+         sleep(self.interval)
+         if (not self.running):
+            break
+         frame = sys._current_frames().get(self.target)
+         if (frame is not None):
+            code = frame.f_code
+            line = frame.f_lineno or code.co_firstlineno
+            self.counts[(os.path.basename(code.co_filename), line, code.co_name)]+=1
+
+   def stop(self):
+      self.running = False
+      self.thread.join()
+      sys.setswitchinterval(self.switch)
+
+   def show(self, top=10):
+      total = max(sum(self.counts.values()), 1)
+      print ("   Sampled "+str(total)+" stack(s), hottest lines:")
+      for (where, count) in self.counts.most_common(top):
+         print ("      {0:5.1f}%  {1}:{2} {3}()".format(count*100/total, *where))
+      print ()
+
+# Returns the peak resident set size of this process, in bytes.
+# Linux keeps a resettable high water mark (VmHWM) in /proc, which lets
+# each algorithm be measured on its own; elsewhere we fall back to the
+# lifetime peak reported by getrusage.
+def peakRSS():
+   try:
+      with open("/proc/self/status") as f:
+         for line in f:
+            if (line.startswith("VmHWM:")):
+               return(int(line.split()[1])*1024)
+   except OSError:
+      pass
+   if (resource is None):
+      return(0)
+   peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   # macOS reports bytes, Linux reports kilobytes
+   return(peak if sys.platform=="darwin" else peak*1024)
+
+# Resets the peak RSS high water mark, where the OS allows it.
+def resetPeakRSS():
+   try:
+      with open("/proc/self/clear_refs", "w") as f:
+         f.write("5")
+   except OSError:
+      pass
+
+# Memory instrumentation for one algorithm run.  Records the peak traced
+# Python allocation (tracemalloc), the peak RSS high water mark, the net
+# change in allocated blocks and the GC collections per generation (via a
+# gc callback).  Tracing slows allocation down considerably, so this is
+# only switched on with --memory and timings taken with it are inflated.
+class MemoryProbe():
+   def __init__(self):
+      self.collections = [0, 0, 0]
+      self.blocks = 0
+      self.peak = 0
+      self.rss = 0
+
+   def onCollect(self, phase, info):
+      if (phase=="stop"):
+         self.collections[info["generation"]]+=1
+
+   def start(self):
+      import tracemalloc
+      self.collections = [0, 0, 0]
+      gc.callbacks.append(self.onCollect)
+      resetPeakRSS()
+      self.blocks = sys.getallocatedblocks()
+      tracemalloc.start()
+
+   # Returns a dict of the measurements, with the blocks and peak bytes
+   # per item for a run over items numbers
+   def stop(self, items=1):
+      import tracemalloc
+      self.peak = tracemalloc.get_traced_memory()[1]
+      tracemalloc.stop()
+      self.blocks = sys.getallocatedblocks()-self.blocks
+      self.rss = peakRSS()
+      gc.callbacks.remove(self.onCollect)
+      items = max(items, 1)
+      return({"peak": self.peak, "rss": self.rss, "blocks": self.blocks,
+              "collections": tuple(self.collections),
+              "blocksPerItem": self.blocks/items, "peakPerItem": self.peak/items})
+
+#End of class
+###########################################################################
+
+# Cyclic garbage collector control around a measurement.  Growing a huge
+# list of fresh objects keeps triggering collections that have nothing to
+# free but still scan everything tracked, which adds jitter to timings.
+# "freeze" collects once and moves every object that exists so far out of
+# the collector's reach (gc.freeze), so passes during the run only see new
+# objects; "disable" switches the collector off for the run.  Both are
+# undone afterwards.  An empty mode leaves the collector alone.
+class GCControl():
+   def __init__(self, mode=""):
+      self.mode = mode
+      self.enabled = True
+
+   def __enter__(self):
+      if (self.mode):
+         gc.collect()
+      if (self.mode=="freeze"):
+         gc.freeze()
+      elif (self.mode=="disable"):
+         self.enabled = gc.isenabled()
+         gc.disable()
+      return(self)
+
+   def __exit__(self, *exc):
+      if (self.mode=="freeze"):
+         gc.unfreeze()
+      elif (self.mode=="disable" and self.enabled):
+         gc.enable()
+
+# Checkpoints for long streaming runs.  Progress is saved per algorithm to
+# a JSON file every so often: the next number to compute, the size of the
+# output file at that point and the time accumulated so far.  The output
+# is synced to disk first and the file is replaced atomically, so whatever
+# is on disk after a crash is consistent.  An interrupted run started
+# again with --resume truncates the output back to the saved size and
+# carries on from the saved number; its timings add up to those of an
+# uninterrupted run.  The time spent saving is reported as its overhead.
+class Checkpoint():
+   def __init__(self, path, every=10.0):
+      import json
+      self.path = path
+      self.every = every
+      self.saves = 0
+      self.seconds = 0.0
+      self.last = perf_counter()
+      self.state = {"run": self.run(), "algorithms": {}}
+      if (os.path.exists(path)):
+         with open(path) as f:
+            state = json.load(f)
+         if (state.get("run")!=self.run()):
+            raise ValueError("checkpoint "+path+" is for a different run")
+         self.state = state
+
+   # The options a checkpoint is only valid for
+   def run(self):
+      return({"start": START_NUMBER, "count": MAX_NUMBERS, "chunk": CHUNK_SIZE,
+              "output": OUTPUT_FILE, "format": OUTPUT_FORMAT, "verbose": VERBOSE})
+
+   # The saved progress of an algorithm, if any
+   def progress(self, name):
+      return(self.state["algorithms"].get(name))
+
+   def due(self):
+      return(perf_counter()-self.last>=self.every)
+
+   # Saves an algorithm's progress: position is the next number to compute
+   def save(self, name, position, renderer, compute, firstOutput, done=False):
+      import json
+      tick = perf_counter()
+      offset = renderer.sync() if renderer is not None else None
+      self.state["algorithms"][name] = {"position": position, "offset": offset,
+                                        "compute": compute, "firstOutput": firstOutput,
+                                        "done": done}
+      self.state["offset"] = offset
+      with open(self.path+".tmp", "w") as f:
+         json.dump(self.state, f)
+         f.flush()
+         os.fsync(f.fileno())
+      os.replace(self.path+".tmp", self.path)
+      self.last = perf_counter()
+      self.saves+=1
+      self.seconds+=self.last-tick
+
+#End of class
+###########################################################################
+
+# Compact result sequence.  Behaves like the results list (index 0 is the
+# placeholder, then one entry per number from start onwards) but stores a
+# single byte per entry: code 0 means "the number itself", anything else
+# indexes a small label table.  Integer values are worked out on access.
+# With pattern=True nothing is stored at all; entries come straight from
+# the 15-cycle until something is written that breaks the pattern.
+class FizzBuzzResult:
+   def __init__(self, start=1, count=0, codes=None, pattern=False):
+      self.first = start-1    # Value of the entry at index 0
+      self.labels = list(LABELS)
+      self.codeOf = {label: code for code, label in enumerate(LABELS) if code}
+      self.count = count+1
+      if (pattern):
+         self.codes = None
+      elif (codes is None):
+         self.codes = bytearray(self.count)
+      else:
+         self.codes = codes
+
+   def __len__(self):
+      if (self.codes is None):
+         return(self.count)
+      return(len(self.codes))
+
+   def __getitem__(self, index):
+      if (isinstance(index, slice)):
+         return([self[i] for i in range(*index.indices(len(self)))])
+      if (index<0):
+         index+=len(self)
+      if (index<0 or index>=len(self)):
+         raise IndexError("FizzBuzzResult index out of range")
+      n = self.first+index
+      if (self.codes is None):
+         code = PATTERN_CODES[n%15]
+      else:
+         code = self.codes[index]
+      return(self.labels[code] if code else n)
+
+   def __setitem__(self, index, value):
+      if (index<0):
+         index+=len(self)
+      if (self.codes is None):
+         self.materialize()
+      self.codes[index] = self.encode(index, value)
+
+   # Only the leading entry can be removed (IE, dropping the placeholder)
+   def __delitem__(self, index):
+      if (index!=0 or len(self)==0):
+         raise IndexError("FizzBuzzResult can only delete its leading entry")
+      if (self.codes is None):
+         self.count-=1
+      elif (isinstance(self.codes, bytearray)):
+         del self.codes[0]
+      else:
+         self.codes = self.codes[1:]
+      self.first+=1
+
+   def __iter__(self):
+      labels = self.labels
+      if (self.codes is None):
+         codes = itertools.islice(itertools.cycle(self.rotation()), self.count)
+      else:
+         codes = self.codes
+      for n, code in zip(itertools.count(self.first), codes):
+         yield labels[code] if code else n
+
+   # Memoryviews (IE, over a NumPy array) can't be pickled; bytearrays can
+   def __getstate__(self):
+      state = self.__dict__.copy()
+      if (self.codes is not None and not isinstance(self.codes, bytearray)):
+         state["codes"] = bytearray(self.codes)
+      return(state)
+
+   def __repr__(self):
+      return("FizzBuzzResult(start="+str(self.first+1)+", len="+str(len(self))+")")
+
+   def append(self, value):
+      if (self.codes is None):
+         self.materialize()
+      elif (not isinstance(self.codes, bytearray)):
+         self.codes = bytearray(self.codes)
+      self.codes.append(self.encode(len(self.codes), value))
+
+   def extend(self, values):
+      for value in values:
+         self.append(value)
+
+   def clear(self):
+      self.codes = bytearray()
+      self.count = 0
+
+   # Returns the code to store for value at index.  An int equal to the
+   # entry's own number is code 0; anything else gets a label slot.
+   def encode(self, index, value):
+      if (type(value) is int and value==self.first+index):
+         return(0)
+      code = self.codeOf.get(value)
+      if (code is None):
+         if (len(self.labels)>255):
+            raise ValueError("FizzBuzzResult supports at most 255 distinct labels")
+         code = self.codeOf[value] = len(self.labels)
+         self.labels.append(value)
+      return(code)
+
+   # The 15-cycle of codes starting at the entry at index 0
+   def rotation(self):
+      r = self.first%15
+      return(PATTERN_CODES[r:]+PATTERN_CODES[:r])
+
+   # Switches from the pure pattern to stored codes
+   def materialize(self):
+      codes = self.rotation()*(self.count//15+1)
+      self.codes = bytearray(codes[:self.count])
+
+#End of class
+###########################################################################
+
+# A generalized set of FizzBuzz rules: (divisor, label) pairs, where a
+# number divisible by several divisors gets their labels joined in order
+# (so 15 is "Fizz"+"Buzz").  The rules repeat every LCM(divisors) numbers,
+# so they are compiled once into a table covering one period, holding the
+# label for each residue (or None for "the number itself").  Tables are
+# cached per rule set and shared by every instance.
+class RuleSet():
+   tables = {}       # (period, table, codes, labels) per tuple of rules
+   unrolled = {}     # Generated functions per (rules, block size)
+
+   def __init__(self, rules=((3, "Fizz"), (5, "Buzz"))):
+      self.rules = tuple((int(d), str(label)) for d, label in rules)
+      if (not self.rules or min(d for d, label in self.rules)<=0):
+         raise ValueError("Rules need at least one positive divisor")
+      compiled = RuleSet.tables.get(self.rules)
+      if (compiled is None):
+         compiled = RuleSet.tables[self.rules] = self.compile()
+      self.period, self.table, self.codes, self.labels = compiled
+
+   def compile(self):
+      period = 1
+      for d, label in self.rules:
+         period = period*d//math.gcd(period, d)
+      table = tuple("".join(label for d, label in self.rules if r%d==0) or None
+                    for r in range(period))
+      # The same table as codes into a label list, for FizzBuzzResult
+      labels = [None]+sorted(set(table)-{None})
+      codeOf = {label: code for code, label in enumerate(labels)}
+      codes = bytes(codeOf[t] for t in table) if len(labels)<=256 else None
+      return((period, table, codes, labels))
+
+   # The table rotated to start at residue of n
+   def rotation(self, n):
+      r = n%self.period
+      return(self.table[r:]+self.table[:r])
+
+   # The value of n
+   def value(self, n):
+      t = self.table[n%self.period]
+      return(n if t is None else t)
+
+   # Block size for unroll(): size rounded up to a whole number of periods
+   def blockSize(self, size):
+      return(max(-(-size//self.period), 1)*self.period)
+
+   # The unrolling engine.  Generates the source of a function that appends
+   # whole blocks of blockSize(size) values, one literal tuple per block
+   # with every label written out and every number as base+k, compiles it
+   # and caches it per rule set and block size.  The function is called as
+   # f(base, stop, out) with base a multiple of the period, and appends
+   # the values of base+1 up to stop, which must be a whole number of
+   # blocks further on.
+   def unroll(self, size):
+      block = self.blockSize(size)
+      key = (self.rules, block)
+      if (key not in RuleSet.unrolled):
+         items = ", ".join(repr(self.table[k%self.period]) if self.table[k%self.period]
+                           else "base+"+str(k) for k in range(1, block+1))
+         source = ("def unrolled(base, stop, out):\n"
+                   "   extend = out.extend\n"
+                   "   while (base<stop):\n"
+                   "      extend(("+items+",))\n"
+                   "      base+="+str(block)+"\n")
+         scope = {}
+         exec(compile(source, "<unrolled "+str(block)+">", "exec"), scope)
+         RuleSet.unrolled[key] = scope["unrolled"]
+      return(RuleSet.unrolled[key])
+
+   # The stamping engine: values of count numbers from start, as a list.
+   # One comprehension over the cycled table; no per-number arithmetic.
+   def stamp(self, start, count):
+      return([t or n for n, t in zip(range(start, start+count),
+                                     itertools.cycle(self.rotation(start)))])
+
+   # As stamp(), but into a FizzBuzzResult (with its placeholder), which
+   # is just the code table repeated across a bytearray.
+   def compact(self, start, count):
+      if (self.codes is None):
+         raise ValueError("Too many distinct labels for a compact result")
+      r = (start-1)%self.period
+      cycle = self.codes[r:]+self.codes[:r]
+      codes = bytearray((cycle*((count+1)//self.period+1))[:count+1])
+      codes[0] = 0
+      result = FizzBuzzResult(start, codes=codes)
+      result.labels = list(self.labels)
+      result.codeOf = {label: code for code, label in enumerate(self.labels) if code}
+      return(result)
+
+#End of class
+###########################################################################
+
+# Random access queries.  Like the Pattern algorithm, this relies on the
+# rules repeating (every 15 numbers for the standard ones): the value of n
+# follows from n%period alone.  Single values, windows anywhere on the
+# number line and batches of indices are answered without generating
+# anything before them, so the cost depends only on the size of the answer.
+class Query():
+   def __init__(self, ruleSet=None):
+      self.ruleSet = ruleSet if ruleSet is not None else RuleSet()
+
+   # The FizzBuzz value of n
+   def value(self, n):
+      return(self.ruleSet.value(n))
+
+   # Lazily yields the values of start..stop-1
+   def range(self, start, stop):
+      table = itertools.cycle(self.ruleSet.rotation(start))
+      for n in range(start, stop):
+         t = next(table)
+         yield n if t is None else t
+
+   # The values of many (unordered) indices at once
+   def batch(self, indices):
+      table = self.ruleSet.table
+      period = self.ruleSet.period
+      return([table[n%period] or n for n in indices])
+
+#End of class
+###########################################################################
+
+# Range cache.  Keeps computed values in blocks of blockSize numbers (the
+# first block being 1..blockSize), per key (IE, algorithm and rules), up
+# to a budget of budget bytes.  A request is answered from the blocks it
+# covers and only the missing ones are computed, each run of neighbours in
+# one call, so a larger or overlapping request extends what's cached
+# rather than starting again.  The least recently used blocks are evicted
+# to stay within budget.  Hits and misses count blocks, not requests.
+# Blocks that come back short from compute() are returned but not kept.
+class RangeCache():
+   def __init__(self, budget=64*1048576, blockSize=CACHE_BLOCK):
+      self.budget = budget
+      self.blockSize = max(blockSize, 1)
+      self.blocks = OrderedDict()    # (key, index) -> (values, bytes), oldest first
+      self.used = 0
+      self.hits = 0
+      self.misses = 0
+      self.evictions = 0
+
+   def __len__(self):
+      return(len(self.blocks))
+
+   # The values of start..stop-1 for key, as a list.  compute(low, high)
+   # returns the values of low..high for the blocks that are missing.
+   def range(self, key, start, stop, compute):
+      if (stop<=start):
+         return([])
+      size = self.blockSize
+      first, last = (start-1)//size, (stop-2)//size
+      found = {}
+      missing = []
+      for index in range(first, last+1):
+         entry = self.blocks.get((key, index))
+         if (entry is None):
+            missing.append(index)
+         else:
+            self.blocks.move_to_end((key, index))
+            found[index] = entry[0]
+      self.hits+=len(found)
+      self.misses+=len(missing)
+      for gap, pairs in itertools.groupby(enumerate(missing), lambda pair: pair[1]-pair[0]):
+         run = [index for i, index in pairs]
+         values = compute(run[0]*size+1, (run[-1]+1)*size)
+         if (not isinstance(values, list)):
+            values = list(values)
+         for i, index in enumerate(run):
+            found[index] = values[i*size:(i+1)*size]
+            if (len(found[index])==size):
+               self.put((key, index), found[index])
+      values = []
+      for index in range(first, last+1):
+         low = index*size+1
+         values.extend(found[index][max(start-low, 0):stop-low])
+      return(values)
+
+   # Adds a block, evicting the oldest to make room.  A block bigger than
+   # the whole budget isn't kept.
+   def put(self, key, values):
+      size = sys.getsizeof(values)+sum(sys.getsizeof(v) for v in values if type(v) is int)
+      if (size>self.budget):
+         return
+      while (self.used+size>self.budget):
+         self.used-=self.blocks.popitem(last=False)[1][1]
+         self.evictions+=1
+      self.blocks[key] = (values, size)
+      self.used+=size
+
+   def clear(self):
+      self.blocks.clear()
+      self.used = 0
+
+   def stats(self):
+      lookups = self.hits+self.misses
+      return({"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+              "hitRate": self.hits/lookups if lookups else 0.0,
+              "blocks": len(self.blocks), "bytes": self.used, "budget": self.budget})
+
+   # One line summary of stats()
+   def describe(self):
+      stats = self.stats()
+      return("Cache: "+f'{stats["hits"]:n}'+" hit(s), "+f'{stats["misses"]:n}'+" miss(es) ("+
+             f'{stats["hitRate"]*100:<.1f}'+"% hit rate), "+f'{stats["evictions"]:n}'+
+             " eviction(s), "+f'{stats["blocks"]:n}'+" block(s) in "+
+             f'{stats["bytes"]/1048576:<.1f}'+" of "+f'{stats["budget"]/1048576:<.1f}'+" MB")
+
+#End of class
+###########################################################################
+
+# Results on disk.  A store is a file with a small JSON header (the range,
+# the label table and the algorithm that filled it) followed, from the
+# next page boundary, by one code byte per number as in FizzBuzzResult.
+# The codes are memory-mapped, so slices of the range can be filled by
+# separate processes at once, and reading any number or window back only
+# touches the pages it needs, without parsing or loading the rest.
+class FizzBuzzStore():
+   MAGIC = b"FIZZBUZZ"
+   ALIGN = 4096
+
+   def __init__(self, path, writable=False):
+      import json
+      import mmap
+      self.file = open(path, "r+b" if writable else "rb")
+      if (self.file.read(len(self.MAGIC))!=self.MAGIC):
+         self.file.close()
+         raise ValueError(path+" is not a FizzBuzz store")
+      size = int.from_bytes(self.file.read(8), "little")
+      header = json.loads(self.file.read(size))
+      self.start = header["start"]
+      self.count = header["count"]
+      self.algorithm = header["algorithm"]
+      self.filled = header.get("filled", header["count"])
+      self.rules = tuple(tuple(rule) for rule in header.get("rules", ()))
+      self.labels = [None]+header["labels"]
+      self.codeOf = {label: code for code, label in enumerate(self.labels) if code}
+      self.offset = header["offset"]
+      self.map = mmap.mmap(self.file.fileno(), 0,
+                           access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+   def __len__(self):
+      return(self.filled)
+
+   def __enter__(self):
+      return(self)
+
+   def __exit__(self, *exc):
+      self.close()
+
+   def close(self):
+      self.map.close()
+      self.file.close()
+
+   # Position of n in the code area.  Only the filled part can be read;
+   # the rest of the range holds nothing yet (or what a failed fill left).
+   def position(self, n, writing=False):
+      if (n<self.start or n>=self.start+(self.count if writing else self.filled)):
+         raise IndexError(str(n)+" is outside the "+("stored" if writing else "filled")+" range")
+      return(self.offset+n-self.start)
+
+   # The value of n
+   def value(self, n):
+      code = self.map[self.position(n)]
+      return(self.labels[code] or n)
+
+   # The values of start..stop-1, as a list
+   def range(self, start, stop):
+      if (stop<=start):
+         return([])
+      codes = self.map[self.position(start):self.position(stop-1)+1]
+      labels = self.labels
+      return([labels[c] or n for n, c in zip(range(start, stop), codes)])
+
+   # Stores the values of numbers from start onwards
+   def write(self, start, values):
+      codeOf = self.codeOf
+      try:
+         codes = bytes([codeOf[v] if isinstance(v, str) else 0 for v in values])
+      except KeyError as e:
+         raise ValueError("label "+str(e)+" does not come from the rules")
+      if (not codes):
+         return
+      at = self.position(start, True)
+      self.position(start+len(codes)-1, True)
+      self.map[at:at+len(codes)] = codes
+
+#End of class
+###########################################################################
+
+# Creates an empty store for count numbers from start; the code area is
+# sparse until filled.  "filled" counts the numbers known to be stored,
+# from start, and is only raised once they are.
+def createStore(path, start, count, ruleSet, algorithm=""):
+   import json
+   if (ruleSet.codes is None):
+      raise ValueError("Too many distinct labels for a store")
+   header = {"start": start, "count": count, "filled": 0, "labels": ruleSet.labels[1:],
+             "rules": ruleSet.rules, "algorithm": algorithm}
+   size = len(FizzBuzzStore.MAGIC)+8+len(json.dumps(dict(header, offset=0)))+32
+   header["offset"] = -(-size//FizzBuzzStore.ALIGN)*FizzBuzzStore.ALIGN
+   with open(path, "wb") as f:
+      writeStoreHeader(f, header)
+      f.truncate(header["offset"]+count)
+
+# Raises a store's count and filled in place, growing the code area to
+# match.  Nothing already stored moves.
+def growStore(path, count=None, filled=None):
+   with FizzBuzzStore(path) as store:
+      header = {"start": store.start, "count": store.count, "filled": store.filled,
+                "labels": store.labels[1:], "rules": store.rules,
+                "algorithm": store.algorithm, "offset": store.offset}
+   if (count is not None):
+      header["count"] = max(count, header["count"])
+   if (filled is not None):
+      header["filled"] = max(filled, header["filled"])
+   with open(path, "r+b") as f:
+      writeStoreHeader(f, header)
+      f.truncate(header["offset"]+header["count"])
+
+def writeStoreHeader(f, header):
+   import json
+   data = json.dumps(header).encode()
+   if (len(FizzBuzzStore.MAGIC)+8+len(data)>header["offset"]):
+      raise ValueError("Store header does not fit before its code area")
+   f.seek(0)
+   f.write(FizzBuzzStore.MAGIC+len(data).to_bytes(8, "little")+data)
+
+# How many numbers of this range a store at path already holds: the
+# numbers it has filled, if it starts at the same number with the same
+# rules and algorithm, and 0 otherwise (or if there's no store).
+def storedCount(path, start, ruleSet, algorithm):
+   try:
+      with FizzBuzzStore(path) as store:
+         if (store.start==start and store.rules==ruleSet.rules and store.algorithm==algorithm):
+            return(store.filled)
+   except (OSError, ValueError, KeyError):
+      pass
+   return(0)
+
+
 # Base class, will be inherited by different algorithms
 # As python doesn't formally  support interfaces, this class
 # also has an algorithm implementation.  It is "Basic" and
@@ -79,20 +988,34 @@ class Timer():
 # This basic implementation is consistently middle of the rankings.
 class FizzBuzz:
    # Class attributes
-   Max = 100         # Number of items to FizzBuzz
+   Start = 1         # First number to FizzBuzz
+   Max = 100         # Last number to FizzBuzz
    Name = ""         # Algorithm name
    results=[0]       # Results stored here
-   timer = Timer()   # A timer object for high performance timing
 
    # The base constructor should be calle be all derived classes.
-   # IE, "super().__init__("Name of Algorithm")
-   def __init__(self, name="Approach 0: Basic - FizzBuzz"):
-      # Start performance timer
-      self.timer.start()
+   # IE, "super().__init__("Name of Algorithm", **settings)
+   # Nothing here is timed (see run()) or printed.  Settings (start, count,
+   # compact, chunkSize, profile and, for the algorithms that use them,
+   # rules, unroll, indexed and recursionLimit) are passed in by Engine;
+   # any left out take the command line option's value.
+   def __init__(self, name="Approach 0: Basic - FizzBuzz", **settings):
+      self.timer = Timer()   # This algorithm's own high performance timer
       self.Name = name
-      self.results=[0]
-      self.Max = MAX_NUMBERS
-      print(self.Name+" (now executing...)")
+      self.settings = settings
+      self.Start = self.setting("start", START_NUMBER)
+      self.Max = self.Start+self.setting("count", MAX_NUMBERS)-1
+      self.compact = self.setting("compact", COMPACT)
+      self.chunkSize = self.setting("chunkSize", CHUNK_SIZE)
+      self.profile = self.setting("profile", PROFILE)
+      self.excluded = None   # Why this run can't be ranked, if it can't
+      self.results=self.newResults()
+      self.phases = {}
+      self.phaseStack = []
+
+   # A setting given to the constructor, or else default
+   def setting(self, name, default):
+      return(self.settings.get(name, default))
 
    # Returns the name of the class.
    # Used in automation / templating in main().
@@ -100,12 +1023,56 @@ class FizzBuzz:
    def myName(self):
       return (type(self).__name__)
 
+   # Hook for timing part of an algorithm separately; see Phase.  Costs
+   # next to nothing unless profiling is switched on.
+   def phase(self, name):
+      if (not self.profile):
+         return(nullcontext())
+      return(Phase(self, name))
+
+   # Adds time to a phase
+   def charge(self, name, seconds):
+      self.phases[name] = self.phases.get(name, 0.0)+seconds
+
+   # Largest range the algorithm can handle, or None if unlimited
+   def limit(self):
+      return(None)
+
+   # Readies the algorithm for ranges of up to size numbers, outside of
+   # any timing.  Nothing to do for most.
+   def prepare(self, size):
+      pass
+
+   # The rules this algorithm implements; the reference for verify()
+   def rules(self):
+      return(RuleSet())
+
+   # Amount of numbers in the current range (Start..Max inclusive)
+   def size(self):
+      return (self.Max-self.Start+1)
+
+   # results[0] is a placeholder, so the number n lives at index n-Start+1.
+   # Returns the index of the first multiple of divisor in the range,
+   # which lets the stamping algorithms work on any window of numbers.
+   def firstIndex(self, divisor):
+      return ((-self.Start)%divisor+1)
+
+   # Returns an empty results container for the current range, holding just
+   # the placeholder.  With prefill, it already holds every number of the
+   # range for the algorithms that stamp over them.
+   def newResults(self, prefill=False):
+      if (self.compact==True):
+         return(FizzBuzzResult(self.Start, self.size() if prefill else 0))
+      if (prefill):
+         return([i for i in range(self.Start-1, self.Max+1)])
+      return([0])
+
    # Base class wasn't going to have a base implementation,
    # but since Python doesn't have formal support for interfaces,
    # it's best to show an implementation that derived classes
    # can override with their own.
    def doFizzBuzz(self):
-      for i in range(1,self.Max+1):
+      for i in range(self.Start,self.Max+1):
          if (i%15==0):
             self.results.append("FizzBuzz")
          elif (i%5==0):
@@ -115,13 +1082,259 @@ class FizzBuzz:
          else:
             self.results.append(i)
 
-   # Reports output, stops timing, and returns elapsed time
+   # Streaming iterator.  Runs the algorithm over consecutive windows of
+   # chunkSize numbers and yields each window's results (without the
+   # placeholder) as soon as it is computed.  Only one window is alive at
+   # a time, so memory stays flat no matter how large Max is.
+   def iterChunks(self, chunkSize=0, resume=None):
+      if (chunkSize<=0):
+         chunkSize=self.chunkSize
+      first, last = self.Start, self.Max
+      self.prepare(min(chunkSize, self.size()))
+      try:
+         for low in range(resume or first, last+1, chunkSize):
+            yield self.window(low, min(low+chunkSize-1, last))
+      finally:
+         self.Start, self.Max = first, last
+
+   # Runs the algorithm over low..high only and returns that window's
+   # results, without the placeholder.  Leaves the range set to the window.
+   def window(self, low, high):
+      self.Start = low
+      self.Max = high
+      self.results=self.newResults()
+      self.doFizzBuzz()
+      chunk = self.results
+      self.results=self.newResults()
+      del chunk[0]
+      return(chunk)
+
+   # The values of low..high as one sequence, computed a window of at most
+   # step numbers (and no more than limit()) at a time
+   def span(self, low, high, step=0):
+      step = step if step>0 else self.chunkSize
+      step = min(step, self.limit() or step)
+      self.prepare(min(step, high-low+1))
+      if (high-low+1<=step):
+         return(self.window(low, high))
+      values = []
+      for first in range(low, high+1, step):
+         values.extend(self.window(first, min(first+step-1, high)))
+      return(values)
+
+   # Runs doFizzBuzz(), timing it and nothing else, and returns the time
+   def run(self):
+      self.timer.start()
+      self.doFizzBuzz()
+      self.timer.stop()
+      return(self.timer.elapsed())
+
+   # Runs the algorithm again from scratch, without any reporting, and
+   # returns the time taken by doFizzBuzz() alone.
+   def measure(self):
+      self.results=self.newResults()
+      elapsed = self.run()
+      self.results=self.newResults()
+      return(elapsed)
+
+   # Benchmark mode.  Warms up, then measures repeat runs and returns the
+   # samples.  With repeat<=0 the count is calibrated (like timeit) so the
+   # runs fill roughly BENCH_SECONDS, within 5..1000 repetitions.
+   def benchmark(self, warmup=1, repeat=0):
+      import statistics
+      for i in range(warmup):
+         self.measure()
+      samples = []
+      if (repeat<=0):
+         samples.append(self.measure())
+         repeat = math.ceil(BENCH_SECONDS/max(samples[0], 1e-9))
+         repeat = min(max(repeat, 5), 1000)-1
+      for i in range(repeat):
+         samples.append(self.measure())
+      print ("   Benchmarked "+f'{self.size():n}'+" in "+str(len(samples))+" runs after "+
+             str(warmup)+" warmup: median "+f'{statistics.median(samples):<.6f}'+" seconds.\n")
+      return(samples)
+
+   # Verification.  Re-runs the algorithm chunk by chunk and compares every
+   # chunk with the canonical sequence for its rules (from Query) through a
+   # digest of its plain text rendering, so neither sequence is ever held
+   # in full.  Returns None if the output matches,
+   # otherwise a description of the first difference.
+   def verify(self):
+      import hashlib
+      stream = hashlib.blake2b(digest_size=16)
+      position = self.Start
+      for chunk in self.iterChunks():
+         count = max(min(len(chunk), self.Max-position+1), 0)
+         reference = list(Query(self.rules()).range(position, position+count))
+         data = plainBytes(itertools.islice(chunk, count))
+         if (data!=plainBytes(reference)):
+            for n, got, expected in zip(itertools.count(position), chunk, reference):
+               if (str(got)!=str(expected)):
+                  return("first difference at ["+str(n)+"]: got "+str(got)+
+                         ", expected "+str(expected))
+         if (len(chunk)>count):
+            return("produced "+str(len(chunk)-count)+" item(s) past ["+str(self.Max)+"]")
+         stream.update(data)
+         position+=len(chunk)
+      if (position<=self.Max):
+         return("output ends at ["+str(position-1)+"], expected ["+str(self.Max)+"]")
+      print ("   Verified against reference, digest "+stream.hexdigest()+".\n")
+      return(None)
+
+   # Prints the completion line, shared by report() and stream().  With
+   # a timer, its CPU times are shown too.
+   def summarize(self, elapsed, firstOutput, timer=None):
+      print ("   Completed "+f'{self.size():n}'+" in "+f'{elapsed:<.6f}'+" seconds "+
+             "(first output "+f'{firstOutput:<.3f}'+"s, "+
+             ("CPU "+f'{timer.cpu():<.6f}'+"s, thread "+f'{timer.threadCpu():<.6f}'+"s, "
+              if timer is not None else "")+
+             "peak RSS "+f'{peakRSS()/1048576:<.1f}'+" MB).\n")
+
+   # Streaming counterpart to doFizzBuzz() + report().  Output is printed
+   # chunk by chunk as the algorithm produces it.  With a checkpoint file,
+   # progress is saved as it goes and an earlier run is carried on from
+   # where it stopped.
+   def stream(self):
+      if (not CHECKPOINT_FILE):
+         return(self.consume(self.iterChunks(), perf_counter()))
+      checkpoint = Checkpoint(CHECKPOINT_FILE, CHECKPOINT_EVERY)
+      saved = checkpoint.progress(self.myName())
+      if (saved is not None and saved["done"]):
+         print ("   Already completed, in "+f'{saved["compute"]:<.3f}'+" seconds.\n")
+         return(saved["compute"])
+      if (saved is not None):
+         print ("   Resuming from ["+str(saved["position"])+"] after "+
+                f'{saved["compute"]:<.3f}'+" seconds.")
+      chunks = self.iterChunks(resume=saved["position"] if saved else None)
+      return(self.consume(chunks, perf_counter(), checkpoint, saved))
+
+   # Sharded counterpart to stream().  Chunks are computed by a pool of
+   # worker processes, each running its own instance of this algorithm,
+   # and merged back in order as they are consumed.
+   def shard(self, workers):
+      from concurrent.futures import ProcessPoolExecutor
+      print("   Sharded across "+str(workers)+" worker(s):")
+      with ProcessPoolExecutor(workers, initializer=shardInit,
+                               initargs=(MAX_NUMBERS, START_NUMBER, RECURSION_LIMIT, COMPACT, RULES,
+                                         UNROLL)) as pool:
+         # Spin up every worker process before timing starts
+         list(pool.map(sleep, [0.05]*workers))
+         chunks = shardedChunks(pool, self.myName(), self.Start, self.Max, workers)
+         return(self.consume(chunks, perf_counter()))
+
+   # Stores the range in a memory-mapped file (see FizzBuzzStore), chunk by
+   # chunk, or in parallel slices across a pool of worker processes that
+   # each map the file and write their own slices.  Returns the time taken.
+   # A store already filled by this algorithm over the start of the range
+   # (IE, by a run with a smaller --max) is grown instead, computing only
+   # the numbers it doesn't hold yet.
+   def store(self, path, workers=1):
+      from concurrent.futures import ProcessPoolExecutor
+      filled = min(storedCount(path, self.Start, self.rules(), self.myName()), self.size())
+      if (filled>0):
+         growStore(path, count=self.size())
+         if (filled<self.size()):
+            print ("   Extending the "+f'{filled:n}'+" numbers already stored by "+
+                   f'{self.size()-filled:n}'+".")
+         else:
+            print ("   All "+f'{filled:n}'+" numbers are already stored.\n")
+            self.excluded = "cached: already stored in "+path
+            return(0.0)
+      else:
+         createStore(path, self.Start, self.size(), self.rules(), self.myName())
+      first = self.Start+filled
+      begin = perf_counter()
+      try:
+         if (workers>1):
+            with ProcessPoolExecutor(workers, initializer=shardInit,
+                                     initargs=(MAX_NUMBERS, START_NUMBER, RECURSION_LIMIT,
+                                               COMPACT, RULES, UNROLL)) as pool:
+               begin = perf_counter()
+               slices = [pool.submit(storeWork, self.myName(), path, low,
+                                     min(low+CHUNK_SIZE-1, self.Max))
+                         for low in range(first, self.Max+1, CHUNK_SIZE)]
+               for done in slices:
+                  done.result()
+         else:
+            with FizzBuzzStore(path, True) as store:
+               low = first
+               for chunk in self.iterChunks(resume=first):
+                  store.write(low, chunk)
+                  low+=len(chunk)
+         growStore(path, filled=self.size())
+      except (ValueError, IndexError) as e:
+         # What was stored before this run stays readable; a new store
+         # holds nothing usable
+         print ("   Store failed: "+str(e)+"\n")
+         self.excluded = "store failed: "+str(e)
+         if (filled==0):
+            os.remove(path)
+         return(perf_counter()-begin)
+      elapsed = perf_counter()-begin
+      self.summarize(elapsed, elapsed)
+      print ("   Stored to "+path+" ("+f'{os.path.getsize(path)/1048576:<.1f}'+" MB) with "+
+             str(workers)+" worker(s).\n")
+      return(elapsed)
+
+   # Consumes a sequence of result chunks, printing them in verbose mode.
+   # Only the time spent waiting on chunks is counted, so the result
+   # remains comparable with report(), which doesn't time the CRT output
+   # portion either.  First output is measured from begin.  Progress is
+   # saved to checkpoint, if given, carrying on from saved.
+   def consume(self, chunks, begin, checkpoint=None, saved=None):
+      compute = 0.0
+      firstOutput = 0.0
+      n = self.Start
+      started = False
+      if (saved is not None):
+         compute, firstOutput = saved["compute"], saved["firstOutput"]
+         n, started = saved["position"], True
+      if (checkpoint is not None):
+         # Drop any output written after the last checkpoint
+         offset = (saved or checkpoint.state).get("offset")
+         if (offset is not None):
+            os.truncate(OUTPUT_FILE, offset)
+      renderer = None
+      if (started and VERBOSE==True):
+         print("--> " + self.Name)
+         renderer = openRenderer()
+      tick = perf_counter()
+      for chunk in chunks:
+         tock = perf_counter()
+         compute += tock-tick
+         if (not started):
+            started = True
+            firstOutput = tock-begin
+            if (VERBOSE==True):
+               print("--> " + self.Name)
+               renderer = openRenderer()
+         if (renderer is not None):
+            renderer.write(chunk, n)
+         n+=len(chunk)
+         if (checkpoint is not None and checkpoint.due()):
+            checkpoint.save(self.myName(), n, renderer, compute, firstOutput)
+         tick = perf_counter()
+      if (checkpoint is not None):
+         checkpoint.save(self.myName(), n, renderer, compute, firstOutput, True)
+      if (renderer is not None):
+         renderer.close()
+      self.summarize(compute, firstOutput)
+      if (checkpoint is not None):
+         print ("   Checkpointed "+str(checkpoint.saves)+" time(s) in "+
+                f'{checkpoint.seconds:<.3f}'+" seconds.\n")
+      return(compute)
+
+   # The results to print, without the placeholder
+   def output(self):
+      return(itertools.islice(self.results, 1, None))
+
+   # Reports output after run(), and returns elapsed time
    # As some algorithms have different output requirements,
    # accepts a formatted output string, optionally.
    # We don't time the CRT output portion.
    def report(self, dataString=""):
-      self.timer.stop()
-      print ("   Completed "+f'{MAX_NUMBERS:n}'+" in "+f'{self.timer.elapsed():<.3f}'+" seconds.\n")
+      self.summarize(self.timer.elapsed(), self.timer.elapsed(), self.timer)
 
       # If we are in quiet mode, abort report and return time
       if (VERBOSE==False):
@@ -131,8 +1344,9 @@ class FizzBuzz:
       print("--> " + self.Name)
 
       if (dataString == ""):
-         for i in range (1, len(self.results)):
-            print ("[{0}] {1}".format(i, self.results[i]))
+         renderer = openRenderer()
+         renderer.write(self.output(), self.Start)
+         renderer.close()
       else:
          print (dataString)
 
@@ -149,21 +1363,45 @@ class FizzBuzz:
 # numbers up to Max, and remove multiples of 3 (Fizz), 5 (Buzz) and
 # 15 (FizzBuzz).  A very fast and simple algorithm
 class Sieve(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach 1: Sieve of Eratosthenes")
+   def __init__(self, **settings):
+      super().__init__("Approach 1: Sieve of Eratosthenes", **settings)
 
    def doFizzBuzz(self):
-      self.results = [i for i in range(self.Max+1)]
+      with self.phase("build"):
+         self.results = self.newResults(prefill=True)
 
       # For each multiple, step and tag
-      for i in range(0, len(self.results), 3):
-         self.results[i]="Fizz"
+      with self.phase("stamp"):
+         for i in range(self.firstIndex(3), len(self.results), 3):
+            self.results[i]="Fizz"
+
+         for i in range(self.firstIndex(5), len(self.results), 5):
+            self.results[i]="Buzz"
 
-      for i in range(0, len(self.results), 5):
-         self.results[i]="Buzz"
+         for i in range(self.firstIndex(15), len(self.results), 15):
+            self.results[i]="FizzBuzz"
+
+#End of class
+###########################################################################
+# Approach 1b: Sieve, lean
+# The Sieve with fewer allocations.  The numbers are laid down by
+# list(range()) instead of a comprehension, and each multiple is stamped
+# with one slice assignment from a list of repeated labels rather than a
+# Python level loop.  Compact results don't support slices, so they use
+# the original.
+class SieveLean(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach 1b: Sieve, lean", **settings)
 
-      for i in range(0, len(self.results), 15):
-         self.results[i]="FizzBuzz"
+   def doFizzBuzz(self):
+      if (self.compact==True):
+         return(Sieve.doFizzBuzz(self))
+      with self.phase("build"):
+         self.results = list(range(self.Start-1, self.Max+1))
+      with self.phase("stamp"):
+         for divisor, label in ((3, "Fizz"), (5, "Buzz"), (15, "FizzBuzz")):
+            first = self.firstIndex(divisor)
+            self.results[first::divisor] = [label]*len(range(first, len(self.results), divisor))
 
 #End of class
 ###########################################################################
@@ -174,23 +1412,29 @@ class Sieve(FizzBuzz):
 # Post mining, uses a reduction function to swap out * values with Fizz,
 # Buzz, or FizzBuzz.
 class Minefield(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach 2: Minefield")
+   def __init__(self, **settings):
+      super().__init__("Approach 2: Minefield", **settings)
 
    def doFizzBuzz(self):
-      self.results = [i for i in range(self.Max+1)]
-      for i in range (1, self.Max+1):
-         if (i%15==0 or i%5==0 or i%3==0):
-            self.results[i]="*"
-      self.reduction()
+      with self.phase("build"):
+         self.results = self.newResults(prefill=True)
+      offset = self.Start-1
+      with self.phase("stamp"):
+         for i in range (self.Start, self.Max+1):
+            if (i%15==0 or i%5==0 or i%3==0):
+               self.results[i-offset]="*"
+      with self.phase("reduction"):
+         self.reduction()
 
    # Reduction function
    def reduction(self):
+      offset = self.Start-1
       for i in range(1,len(self.results)):
          if self.results[i]=="*":
-            if i%15==0: self.results[i]="Fizzbuzz"
-            elif i%5==0: self.results[i]="Buzz"
-            elif i%3==0: self.results[i]="Fizz"
+            n = i+offset
+            if n%15==0: self.results[i]="Fizzbuzz"
+            elif n%5==0: self.results[i]="Buzz"
+            elif n%3==0: self.results[i]="Fizz"
 
 #End of class
 ###########################################################################
@@ -200,24 +1444,28 @@ class Minefield(FizzBuzz):
 class Dictionary(FizzBuzz):
    dic = {}
 
-   def __init__(self):
-      super().__init__("Approach #3: Dictionary")
+   def __init__(self, **settings):
+      super().__init__("Approach #3: Dictionary", **settings)
 
    def doFizzBuzz(self):
       self.dic = {0:0}
 
-      # Init / Build dictionary
-      for i in range (1, self.Max+1):
-         self.dic[i]=i
+      # Init / Build dictionary (keyed by position in the range)
+      offset = self.Start-1
+      with self.phase("build"):
+         for i in range (1, self.size()+1):
+            self.dic[i]=i+offset
 
       # Note: must build upwards by factor
-      for i in range(0, len(self.dic), 3):
-         self.dic[i]="Fizz"
-      for i in range(0, len(self.dic), 5):
-         self.dic[i]="Buzz"
-      for i in range(0, len(self.dic), 15):
-         self.dic[i]="FizzBuzz"
-      self.reduction()
+      with self.phase("stamp"):
+         for i in range(self.firstIndex(3), len(self.dic), 3):
+            self.dic[i]="Fizz"
+         for i in range(self.firstIndex(5), len(self.dic), 5):
+            self.dic[i]="Buzz"
+         for i in range(self.firstIndex(15), len(self.dic), 15):
+            self.dic[i]="FizzBuzz"
+      with self.phase("reduction"):
+         self.reduction()
 
    # Reduction function
    def reduction(self):
@@ -238,8 +1486,8 @@ class Dictionary(FizzBuzz):
 # regular bottom-of-the-pack performer.
 # Lambda: Not just complex obfuscation, but poor performance as well.
 class Lambda(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach #4: Lambdas")
+   def __init__(self, **settings):
+      super().__init__("Approach #4: Lambdas", **settings)
 
    # Note we use -1 for 15 as it doesn't share factors 3,5 and is numeric
    def doFizzBuzz(self):
@@ -247,20 +1495,22 @@ class Lambda(FizzBuzz):
       mod5 = lambda x:  (x, 5)[min(x%5==0,1)]
       mod15 = lambda x: (x, -1)[min(x%15==0,1)]
 
-      for i in range (1, self.Max+1):
+      for i in range (self.Start, self.Max+1):
          self.results.append(mod3(mod5(mod15(i))))
-      self.reduction()
+      with self.phase("reduction"):
+         self.reduction()
 
    # Reduction function
    def reduction(self):
       flip = {3: "Fizz",
               5: "Buzz",
              -1: "FizzBuzz"}
+      offset = self.Start-1
       for i in range (1, len(self.results)):
          if (self.results[i] in (3, 5, -1)):
             self.results[i] = flip[self.results[i]]
          else:
-            self.results[i] = i
+            self.results[i] = i+offset
 
 #End of class
 ###########################################################################
@@ -272,19 +1522,24 @@ class Lambda(FizzBuzz):
 # This is dependent on the machine it is executed on, probably a memory issue.
 # I have blanket restricted it to 10,000; if higher, it returns a bogus high time.
 class Recursive(FizzBuzz):
-   def __init__(self):
-      # Adjust recursion limit or it will go poof (+10 is safety margin)
-      # (but must be under recusion max limit).
-      # Also, must use MAX_NUMBERS instead of self.max as it isn't set until
-      # the super is called.
-      if (MAX_NUMBERS >= sys.getrecursionlimit()):
-         if (MAX_NUMBERS<=RECURSION_LIMIT):
-            sys.setrecursionlimit(MAX_NUMBERS+10)
-      super().__init__("Approach #5: Recursion")
-
+   def __init__(self, **settings):
+      super().__init__("Approach #5: Recursion", **settings)
+      self.recursionLimit = self.setting("recursionLimit", RECURSION_LIMIT)
+
+   # Adjust recursion limit or it will go poof (+100 is safety margin,
+   # enough for the frames below us in a pool worker)
+   # (but must be under recusion max limit).
+   # A window past the limit is skipped by doFizzBuzz, but a shorter
+   # last one still runs, so the limit is raised as far as allowed.
+   def prepare(self, size):
+      size = min(size, self.limit())
+      if (size+100 > sys.getrecursionlimit()):
+         sys.setrecursionlimit(size+100)
+
+   # Recursion depth is the size of the range (or streaming window)
    def doFizzBuzz(self):
-      if (MAX_NUMBERS<=RECURSION_LIMIT):
-         self.doRecursion(1)
+      if (self.size()<=self.limit()):
+         self.doRecursion(self.Start)
 
    def doRecursion(self, i=0):
       if (i>=self.Max+1):
@@ -299,10 +1554,31 @@ class Recursive(FizzBuzz):
          self.results.append(i)
       self.doRecursion(i+1)
 
-   def report(self, dataString=""):
-      if (MAX_NUMBERS>RECURSION_LIMIT):
-         print ("Recursion limit of 10,000 exceeded for Recursive algorithm.")
+   def limit(self):
+      return(self.recursionLimit)
+
+   # Whether a run recursing size deep (the whole range unless given)
+   # has to be abandoned
+   def aborted(self, size=None):
+      if ((self.size() if size is None else size)>self.limit()):
+         print ("Recursion limit of "+f'{self.limit():n}'+" exceeded for Recursive algorithm.")
          print ("Test run aborted, and bogus high-time returned.\n")
+         return(True)
+      return(False)
+
+   # Streamed and sharded runs only recurse as deep as a chunk
+   def consume(self, chunks, begin, checkpoint=None, saved=None):
+      if (self.aborted(min(self.chunkSize, self.size()))):
+         return(999.999999)
+      return (super().consume(chunks, begin, checkpoint, saved))
+
+   def benchmark(self, warmup=1, repeat=0):
+      if (self.aborted()):
+         return([999.999999])
+      return (super().benchmark(warmup, repeat))
+
+   def report(self, dataString=""):
+      if (self.aborted()):
          return(999.999999);
       else:
          super().report("")
@@ -315,8 +1591,8 @@ class Recursive(FizzBuzz):
 # Surprisingly slow compared to the others.  Often fails to outrank
 # Recursion algorithm.
 class Nested(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach #6: Nested")
+   def __init__(self, **settings):
+      super().__init__("Approach #6: Nested", **settings)
 
    def nested_mod(self, x, mod, label):
       if not type(x) == str:
@@ -325,19 +1601,43 @@ class Nested(FizzBuzz):
       return(x)
 
    def doFizzBuzz(self):
-      for i in range (1, self.Max+1):
+      for i in range (self.Start, self.Max+1):
          self.results.append(self.nested_mod(
             self.nested_mod(
                self.nested_mod(i, 15, "FizzBuzz"), 5, "Buzz"), 3, "Fizz"))
 
+#End of class
+###########################################################################
+# Approach #6b: Nested, lean
+# Still three nested calls per number, but each level is handed the value
+# to fall back on instead of testing the type of what the inner call
+# returned: no type() calls or comparisons, just one remainder each.
+class NestedLean(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #6b: Nested, lean", **settings)
+
+   def nested_mod(self, x, mod, label, fallback):
+      if (x%mod==0):
+         return(label)
+      return(fallback)
+
+   def doFizzBuzz(self):
+      append = self.results.append
+      for i in range (self.Start, self.Max+1):
+         append(self.nested_mod(i, 15, "FizzBuzz",
+            self.nested_mod(i, 5, "Buzz",
+               self.nested_mod(i, 3, "Fizz", i))))
+
 #End of class
 ###########################################################################
 # Approach #7: Unrolled
 # As an old 6502 programmer, I can attest to the value of unrolling code.
 # Long, verbose, not truly dynamic but very fast. Regularly hits number 1
 # in the rankings. To handle the Max value being altered, this is only
-# unrolled to 100, and only handled in chunks of 100 up to Max. IE, 300 will
-# be handled perfectly while 301 will be handled to 400.
+# unrolled to 90 (six rounds of the 15 number pattern), and handled in
+# chunks of 90 that each start on a multiple of 15.  The few numbers before
+# the first chunk and after the last are done one by one, so any range,
+# starting anywhere, is handled exactly.
 # In a compiled language, the point of unrolling code is to ensure the CPU
 # has enough instructions to process without stalling. So for example, a
 # large loop might unroll 8 iterations at once, with the compiler knowing
@@ -346,15 +1646,20 @@ class Nested(FizzBuzz):
 # well?  To understand that, I'll have to peek under the hood of Python 3.
 # But this is neither the time nor the place.
 class Unrolled(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach #7: Unrolled")
+   def __init__(self, **settings):
+      super().__init__("Approach #7: Unrolled", **settings)
+
+   # Numbers low..high one at a time, for the ends of the range
+   def edge(self, low, high):
+      for value in Query().range(low, high+1):
+         self.results.append(value)
 
-   # Unrolled to 100.  BUT what if Max is changed?
-   # We will assume Max is in multiples of 100.
+   # Unrolled to 90.  BUT what if Max is changed?
+   # Only whole chunks are unrolled; edge() takes care of the rest.
    def doFizzBuzz(self):
-      limit = max(self.Max, 100)
-      base = 0;
-      while (base<max(self.Max, 100)):
+      base = min(self.Start-1+(1-self.Start)%15, self.Max)
+      self.edge(self.Start, base)
+      while (base+90<=self.Max):
          self.results.append(base+1)
          self.results.append(base+2)
          self.results.append("Fizz")
@@ -445,17 +1750,8 @@ class Unrolled(FizzBuzz):
          self.results.append(base+88)
          self.results.append(base+89)
          self.results.append("FizzBuzz")
-         self.results.append(base+91)
-         self.results.append(base+92)
-         self.results.append("Fizz")
-         self.results.append(base+94)
-         self.results.append("Buzz")
-         self.results.append("Fizz")
-         self.results.append(base+97)
-         self.results.append(base+98)
-         self.results.append("Fizz")
-         self.results.append("Buzz")
-         base+=100
+         base+=90
+      self.edge(base+1, self.Max)
 
 #End of class
 ###########################################################################
@@ -466,20 +1762,22 @@ class Unrolled(FizzBuzz):
 # to the other one.  Racer3 is Fizz, Racer5 is Buzz, and if there values
 # are the same, then it is FizzBuzz.  This one excels for large Max values.
 class Racers(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach #8: Racers")
+   def __init__(self, **settings):
+      super().__init__("Approach #8: Racers", **settings)
 
    def doFizzBuzz(self):
-      self.results = [i for i in range(self.Max+1)]
+      self.results = self.newResults(prefill=True)
+      offset = self.Start-1
 
-      racer3=3
-      racer5=5
+      # Both racers start on their first multiple inside the range
+      racer3=self.firstIndex(3)+offset
+      racer5=self.firstIndex(5)+offset
       while (racer3 <= self.Max) and (racer5 <= self.Max):
          if (racer3!=racer5):
-            self.results[racer3]="Fizz"
-            self.results[racer5]="Buzz"
+            self.results[racer3-offset]="Fizz"
+            self.results[racer5-offset]="Buzz"
          else:
-            self.results[racer3]="FizzBuzz"
+            self.results[racer3-offset]="FizzBuzz"
 
          if (racer3<racer5):
             racer3+=3
@@ -490,6 +1788,53 @@ class Racers(FizzBuzz):
             racer3+=3
             racer5+=5
 
+      # One racer finished; the other runs on alone to the end
+      while (racer3 <= self.Max):
+         self.results[racer3-offset]="Fizz"
+         racer3+=3
+      while (racer5 <= self.Max):
+         self.results[racer5-offset]="Buzz"
+         racer5+=5
+
+#End of class
+###########################################################################
+# Approach #8b: Racers, lean
+# The same race, on a number line laid down by list(range()) rather than a
+# comprehension, with the results and the finish line held in locals.
+# Compact results use the original race.
+class RacersLean(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #8b: Racers, lean", **settings)
+
+   def doFizzBuzz(self):
+      if (self.compact==True):
+         return(Racers.doFizzBuzz(self))
+      offset = self.Start-1
+      results = self.results = list(range(offset, self.Max+1))
+      finish = self.Max-offset
+      racer3=self.firstIndex(3)
+      racer5=self.firstIndex(5)
+      while (racer3 <= finish) and (racer5 <= finish):
+         if (racer3!=racer5):
+            results[racer3]="Fizz"
+            results[racer5]="Buzz"
+         else:
+            results[racer3]="FizzBuzz"
+
+         if (racer3<racer5):
+            racer3+=3
+         elif (racer5<racer3):
+            racer5+=5
+         else:
+            racer3+=3
+            racer5+=5
+      while (racer3 <= finish):
+         results[racer3]="Fizz"
+         racer3+=3
+      while (racer5 <= finish):
+         results[racer5]="Buzz"
+         racer5+=5
+
 #End of class
 ###########################################################################
 # Approach #9: Pattern
@@ -498,10 +1843,14 @@ class Racers(FizzBuzz):
 # This approach just stamps the pattern repeatedly.
 # So far, this is usually the fastest algorithm.
 class Pattern(FizzBuzz):
-   def __init__(self):
-      super().__init__("Approach #9: Pattern")
+   def __init__(self, **settings):
+      super().__init__("Approach #9: Pattern", **settings)
 
    def doFizzBuzz(self):
+      # Compact results can be the pattern itself, with nothing stored
+      if (self.compact==True):
+         self.results = FizzBuzzResult(self.Start, self.size(), pattern=True)
+         return
       pattern = {1: 1,
                  2: 2,
                  3: "Fizz",
@@ -518,37 +1867,1089 @@ class Pattern(FizzBuzz):
                  14: 14,
                  15: "FizzBuzz" }
 
-      i=1
+      i=(self.Start-1)%15+1
       count=0
-      while (count<self.Max):
+      size=self.size()
+      while (count<size):
          temp=pattern[i]
          if (temp in [1, 2, 4, 7, 8, 11, 13, 14]):
-            temp=count+1
+            temp=self.Start+count
          self.results.append(temp)
          i+=1
          if (i>15): i=1
          count+=1
 
 #End of class
+###########################################################################
+# Approach #9b: Pattern, lean
+# The pattern as a tuple of labels, with None where the number goes, so no
+# dictionary lookup or membership test is needed to tell them apart, and
+# no second counter is kept to work out the number.
+class PatternLean(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #9b: Pattern, lean", **settings)
+
+   def doFizzBuzz(self):
+      # Compact results can be the pattern itself, with nothing stored
+      if (self.compact==True):
+         self.results = FizzBuzzResult(self.Start, self.size(), pattern=True)
+         return
+      pattern = (None, None, "Fizz", None, "Buzz", "Fizz", None, None,
+                 "Fizz", "Buzz", None, "Fizz", None, None, "FizzBuzz")
+      append = self.results.append
+      i=(self.Start-1)%15
+      for n in range(self.Start, self.Max+1):
+         temp=pattern[i]
+         append(n if temp is None else temp)
+         i+=1
+         if (i==15): i=0
+
+#End of class
+###########################################################################
+# Approach #10: Vectorized (requires NumPy)
+# Classifies the whole range in a handful of array operations.  Each
+# number gets a code in a uint8 array: bit 0 set for Fizz, bit 1 for Buzz,
+# so 3 is FizzBuzz and 0 is the number itself (see LABELS).  Nothing is
+# appended one item at a time; the array is wrapped in a FizzBuzzResult so
+# strings are only created when the results are printed or iterated.
+# This is the throughput reference for very large ranges.
+class Vectorized(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #10: Vectorized", **settings)
+      import numpy
+      self.np = numpy
+
+   def doFizzBuzz(self):
+      np = self.np
+      codes = np.zeros(self.size()+1, dtype=np.uint8)
+      codes[self.firstIndex(3)::3] = 1
+      codes[self.firstIndex(5)::5] |= 2
+      self.results = FizzBuzzResult(self.Start, codes=memoryview(codes))
+
+#End of class
+###########################################################################
+# Approach #11: Rules
+# The generalized engine: any list of (divisor, label) rules, set with
+# --rules (IE 7 -> "Bazz" on top of Fizz and Buzz).  The RuleSet compiles
+# them into a table covering one period (the LCM of the divisors), which
+# is stamped across the range like the Pattern approach.  Compiled tables
+# are cached per rule set, so only the first run pays for compiling.
+class Rules(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #11: Rules", **settings)
+      self.ruleSet = RuleSet(self.setting("rules", RULES))
+
+   def rules(self):
+      return(self.ruleSet)
+
+   def doFizzBuzz(self):
+      if (self.compact==True):
+         self.results = self.ruleSet.compact(self.Start, self.size())
+      else:
+         self.results = [self.Start-1]+self.ruleSet.stamp(self.Start, self.size())
+
+#End of class
+###########################################################################
+# Approach #12: Stamper
+# Skips producing values altogether and writes the output text directly.
+# Every 300 numbers (the LCM of the 15 line FizzBuzz cycle and the 100
+# values of the last two digits), the output is the same text except for
+# the leading digits of each number, which only take 4 values: those of
+# base//100 up to base//100+3.  So a 300 line template with the last two
+# digits already in place is rendered once, and each block is one bytes
+# format call that patches in those leading digits.  They are kept as an
+# ASCII decimal counter, incremented in place, so no integer is converted
+# to text at all past the first few hundred numbers; when the counter
+# gains a digit the lines simply get longer.  The results are the
+# rendered bytes (see Stamped), in the output format chosen.
+class Stamper(FizzBuzz):
+   BLOCK = 300       # Numbers per template
+
+   def __init__(self, **settings):
+      super().__init__("Approach #12: Stamper", **settings)
+      self.templates = {}
+      self.indexed = self.setting("indexed", OUTPUT_FORMAT=="indexed")
+
+   # Returns the block template for a format, with the number of slots
+   # taking each of the 4 leading digit values, in order
+   def template(self, indexed):
+      if (indexed not in self.templates):
+         ruleSet = RuleSet()
+         lines = []
+         slots = [0, 0, 0, 0]
+         for k in range(1, self.BLOCK+1):
+            value = ruleSet.value(k)
+            digits = b"%%b%02d" % (k%100)
+            if (indexed):
+               lines.append(b"["+digits+b"] ")
+               slots[k//100]+=1
+            if (isinstance(value, int)):
+               lines.append(digits+b"\n")
+               slots[k//100]+=1
+            else:
+               lines.append(value.replace("%", "%%").encode()+b"\n")
+         self.templates[indexed] = (b"".join(lines), slots)
+      return(self.templates[indexed])
+
+   # Adds one to a decimal number held as ASCII digits, in place
+   def increment(self, digits):
+      i = len(digits)-1
+      while (i>=0 and digits[i]==57):
+         digits[i] = 48
+         i-=1
+      if (i<0):
+         digits.insert(0, 49)
+      else:
+         digits[i]+=1
+
+   # Renders low..high.  The partial blocks at either end (and everything
+   # below 300, where the leading digits would be empty) are rendered the
+   # ordinary way.
+   def stamp(self, low, high, indexed):
+      base = max(-(-(low-1)//self.BLOCK)*self.BLOCK, self.BLOCK)
+      out = bytearray()
+      if (low<=min(base, high)):
+         out += formatBlock(list(Query().range(low, min(base, high)+1)), low, indexed)
+      if (base<high):
+         blocks = (high-base)//self.BLOCK
+         template, (c0, c1, c2, c3) = self.template(indexed)
+         digits = bytearray(str(base//100).encode())
+         for i in range(blocks):
+            d0 = bytes(digits)
+            self.increment(digits)
+            d1 = bytes(digits)
+            self.increment(digits)
+            d2 = bytes(digits)
+            self.increment(digits)
+            d3 = bytes(digits)
+            out += template % ((d0,)*c0+(d1,)*c1+(d2,)*c2+(d3,)*c3)
+         tail = base+blocks*self.BLOCK+1
+         if (tail<=high):
+            out += formatBlock(list(Query().range(tail, high+1)), tail, indexed)
+      return(out)
+
+   def doFizzBuzz(self):
+      self.results = Stamped(self.stamp(self.Start, self.Max, self.indexed), self.size(), self.indexed)
+
+   def window(self, low, high):
+      self.Start = low
+      self.Max = high
+      self.doFizzBuzz()
+      chunk = self.results
+      self.results = self.newResults()
+      return(chunk)
+
+   def output(self):
+      return(self.results)
+
+   def report(self, dataString=""):
+      size = len(self.results.data)
+      elapsed = super().report(dataString)
+      print ("   Stamped "+f'{size/1048576:<.1f}'+" MB at "+
+             f'{size/max(elapsed, 1e-9)/1048576:<.1f}'+" MB/s.\n")
+      return(elapsed)
+
+#End of class
+###########################################################################
+# Approach #13: Generated
+# Unrolled, without the typing: the unrolled loop body is generated for
+# the rules in use (see RuleSet.unroll) at a block size chosen with
+# --unroll, rounded up to whole periods (multiples of 15 for the standard
+# rules), and compiled once per size.  Blocks start on a multiple of the
+# period, and the numbers before the first block and after the last are
+# done one by one, so any range is handled exactly.  Bigger blocks mean
+# fewer trips round the loop, but a longer function to compile and a
+# bigger tuple to build per trip; the best size depends on the workload.
+class Generated(FizzBuzz):
+   def __init__(self, **settings):
+      super().__init__("Approach #13: Generated", **settings)
+      self.ruleSet = RuleSet(self.setting("rules", RULES))
+      self.unroll = self.setting("unroll", UNROLL)
+      self.prepare(self.size())
+
+   def rules(self):
+      return(self.ruleSet)
+
+   # Generating and compiling the code is setup, so it happens here rather
+   # than in doFizzBuzz().  Done again if the rules or block size change.
+   def prepare(self, size):
+      with self.phase("generate"):
+         self.unrolled = self.ruleSet.unroll(self.unroll)
+         self.block = self.ruleSet.blockSize(self.unroll)
+
+   # Numbers low..high one at a time, for the ends of the range
+   def edge(self, low, high):
+      self.results.extend(Query(self.ruleSet).range(low, high+1))
+
+   def doFizzBuzz(self):
+      block = self.block
+      period = self.ruleSet.period
+      base = min(self.Start-1+(1-self.Start)%period, self.Max)
+      stop = base+(self.Max-base)//block*block
+      self.edge(self.Start, base)
+      self.unrolled(base, stop, self.results)
+      self.edge(stop+1, self.Max)
+
+#End of class
+###########################################################################
+# Sharded execution.  Each pool worker keeps one instance per algorithm
+# and reuses it for every chunk it is handed.
+shardAlgos = {}
+
+def shardInit(maxNumbers, startNumber, recursionLimit, compact, rules, unroll):
+   global MAX_NUMBERS, START_NUMBER, RECURSION_LIMIT, COMPACT, RULES, UNROLL, ANNOUNCE
+   MAX_NUMBERS = maxNumbers
+   START_NUMBER = startNumber
+   RECURSION_LIMIT = recursionLimit
+   COMPACT = compact
+   RULES = rules
+   UNROLL = unroll
+   ANNOUNCE = False
+
+def shardWork(name, low, high):
+   fizzy = shardAlgos.get(name)
+   if (fizzy is None):
+      fizzy = shardAlgos[name] = optionsEngine().build(name)
+   fizzy.prepare(high-low+1)
+   return(fizzy.window(low, high))
+
+# Fills one slice of a store
+def storeWork(name, path, low, high):
+   fizzy = shardAlgos.get(name)
+   if (fizzy is None):
+      fizzy = shardAlgos[name] = optionsEngine().build(name)
+   fizzy.prepare(high-low+1)
+   with FizzBuzzStore(path, True) as store:
+      store.write(low, fizzy.window(low, high))
+
+# Ordered streaming merge.  Keeps a bounded number of chunks in flight
+# (two per worker) and yields them strictly in range order, submitting a
+# new chunk each time one is consumed.  Memory stays flat, unlike a
+# gather-then-concatenate.
+def shardedChunks(pool, name, first, last, workers):
+   lows = iter(range(first, last+1, CHUNK_SIZE))
+   pending = deque()
+   for low in itertools.islice(lows, workers*2):
+      pending.append(pool.submit(shardWork, name, low, min(low+CHUNK_SIZE-1, last)))
+   while (pending):
+      chunk = pending.popleft().result()
+      low = next(lows, None)
+      if (low is not None):
+         pending.append(pool.submit(shardWork, name, low, min(low+CHUNK_SIZE-1, last)))
+      yield chunk
+
+###########################################################################
+# Streaming server.  Serves any range with any registered algorithm over
+# HTTP on localhost, IE:
+#    GET /?start=1&count=1000000&algo=Pattern&format=plain
+# The response uses chunked transfer encoding and is produced by an async
+# generator, one window of SERVE_CHUNK numbers at a time.  Each chunk is
+# only computed once the previous one has drained to the client, and the
+# transport's write buffer is kept small, so a slow reader holds at most
+# about one chunk in memory however large its range is.  With a cache,
+# windows already computed for an earlier request are served from it.
+class FizzBuzzServer():
+   def __init__(self, port=0, chunkSize=SERVE_CHUNK, log=True, cache=None):
+      self.port = port
+      self.chunkSize = chunkSize
+      self.log = log
+      self.cache = cache
+      self.server = None
+
+   async def start(self):
+      import asyncio
+      self.server = await asyncio.start_server(self.handle, "127.0.0.1", self.port,
+                                               backlog=4096)
+      self.port = self.server.sockets[0].getsockname()[1]
+
+   async def stop(self):
+      self.server.close()
+      await self.server.wait_closed()
+
+   # Parses the request line and returns (fizzy, start, count, indexed)
+   def parse(self, line):
+      from urllib.parse import urlsplit, parse_qs
+      parts = line.decode("latin-1").split()
+      if (len(parts)<2 or parts[0]!="GET"):
+         raise ValueError("Only GET is supported")
+      params = {k: v[-1] for k, v in parse_qs(urlsplit(parts[1]).query).items()}
+      name = algorithmNamed(params.get("algo", "Rules"))
+      if (name is None):
+         raise LookupError("Unknown algorithm: "+params["algo"])
+      start = int(params.get("start", START_NUMBER))
+      count = int(params.get("count", MAX_NUMBERS))
+      if (count<0):
+         raise ValueError("count must not be negative")
+      return(optionsEngine().build(name), start, count, params.get("format", "indexed")!="plain")
+
+   # Yields the rendered output of the range, one window at a time, no
+   # bigger than the algorithm can handle.  Computing a window doesn't
+   # await anything, so give the other requests a turn between windows;
+   # otherwise one fast reader hogs the loop.
+   async def chunks(self, fizzy, start, count, indexed):
+      import asyncio
+      stop = start+count
+      step = min(self.chunkSize, fizzy.limit() or self.chunkSize)
+      fizzy.prepare(min(step, count))
+      key = (fizzy.myName(), fizzy.rules().rules)
+      for low in range(start, stop, step):
+         high = min(low+step, stop)-1
+         if (self.cache is None):
+            values = fizzy.window(low, high)
+         else:
+            values = self.cache.range(key, low, high+1,
+                                      lambda first, last: fizzy.span(first, last, step))
+         yield formatBlock(values, low, indexed)
+         await asyncio.sleep(0)
+
+   async def handle(self, reader, writer):
+      import asyncio
+      begin = perf_counter()
+      writer.transport.set_write_buffer_limits(high=65536)
+      try:
+         line = await reader.readline()
+         while ((await reader.readline()) not in (b"\r\n", b"\n", b"")):
+            pass
+         try:
+            fizzy, start, count, indexed = self.parse(line)
+         except LookupError as e:
+            await self.error(writer, "404 Not Found", str(e))
+            return
+         except ValueError as e:
+            await self.error(writer, "400 Bad Request", str(e))
+            return
+         writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                      b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+         latency = None
+         sent = 0
+         async for data in self.chunks(fizzy, start, count, indexed):
+            if (not data):
+               continue
+            writer.write(b"%X\r\n" % len(data)+data+b"\r\n")
+            await writer.drain()
+            if (latency is None):
+               latency = perf_counter()-begin
+            sent+=len(data)
+         writer.write(b"0\r\n\r\n")
+         await writer.drain()
+         seconds = perf_counter()-begin
+         if (self.log):
+            print ("   "+fizzy.myName()+" ["+str(start)+"] +"+f'{count:n}'+": "+f'{sent:n}'+
+                   " bytes in "+f'{seconds:<.3f}'+"s (first chunk "+f'{(latency or seconds)*1000:<.1f}'+
+                   " ms, "+f'{sent/max(seconds, 1e-9)/1048576:<.1f}'+" MB/s)")
+      except (ConnectionError, asyncio.IncompleteReadError):
+         pass
+      # Past the headers, all that can be done is to end the body without
+      # its last chunk, which tells the client the response is incomplete
+      except Exception as e:
+         if (self.log):
+            print ("   Request failed: "+type(e).__name__+": "+str(e))
+      finally:
+         writer.close()
+
+   async def error(self, writer, status, message):
+      body = (message+"\n").encode()
+      writer.write(("HTTP/1.1 "+status+"\r\nContent-Type: text/plain\r\nContent-Length: "+
+                    str(len(body))+"\r\nConnection: close\r\n\r\n").encode()+body)
+      await writer.drain()
+
+#End of class
+###########################################################################
+
+# Runs the server until interrupted
+async def serve(port, cache=None):
+   server = FizzBuzzServer(port, log=VERBOSE, cache=cache)
+   await server.start()
+   print ("Serving FizzBuzz on http://127.0.0.1:"+str(server.port)+
+          "/?start="+str(START_NUMBER)+"&count="+str(MAX_NUMBERS)+"&algo=Rules (Ctrl-C to stop)")
+   async with server.server:
+      await server.server.serve_forever()
+
+# One load generator client.  Requests a range and reads it back, pausing
+# between reads to act as a slow reader if delay is set.  A response that
+# isn't a 200 or whose chunked body is cut short counts as failed.
+async def loadClient(port, path, delay, results):
+   import asyncio
+   begin = perf_counter()
+   try:
+      reader, writer = await asyncio.open_connection("127.0.0.1", port)
+      writer.write(("GET "+path+" HTTP/1.1\r\nHost: localhost\r\n"
+                    "Connection: close\r\n\r\n").encode())
+      await writer.drain()
+      latency = None
+      received = 0
+      head = b""
+      tail = b""
+      while (True):
+         data = await reader.read(65536)
+         if (not data):
+            break
+         if (latency is None):
+            latency = perf_counter()-begin
+            head = data[:16]
+         received+=len(data)
+         tail = (tail+data)[-5:]
+         if (delay>0):
+            await asyncio.sleep(delay)
+      writer.close()
+      if (not head.startswith(b"HTTP/1.1 200") or tail!=b"0\r\n\r\n"):
+         latency = None
+      results.append((latency, perf_counter()-begin, received if latency else 0))
+   except OSError as e:
+      results.append((None, perf_counter()-begin, 0))
+
+# The built-in load generator.  Starts a server in this process on a free
+# port and points clients at it concurrently, each streaming count numbers
+# with the given algorithm, then reports latency and throughput.
+async def loadTest(clients, count, algo, delay, cache=None):
+   import statistics
+   import asyncio
+   server = FizzBuzzServer(log=False, cache=cache)
+   await server.start()
+   path = "/?start="+str(START_NUMBER)+"&count="+str(count)+"&algo="+algo+"&format=plain"
+   print ("Load test: "+str(clients)+" client(s) x "+f'{count:n}'+" numbers with "+algo+
+          ", read delay "+str(delay)+"s")
+   results = []
+   begin = perf_counter()
+   await asyncio.gather(*(loadClient(server.port, path, delay, results) for i in range(clients)))
+   wall = perf_counter()-begin
+   await server.stop()
+
+   failed = sum(1 for r in results if r[0] is None)
+   done = [r for r in results if r[0] is not None]
+   received = sum(r[2] for r in done)
+   print ("   Completed "+str(len(done))+" request(s), "+str(failed)+" failed, in "+f'{wall:<.3f}'+" seconds.")
+   if (done):
+      latencies = sorted(r[0]*1000 for r in done)
+      seconds = sorted(r[1] for r in done)
+      q = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies)>1 else latencies*99
+      print ("   First byte (ms):  p50 "+f'{q[49]:.1f}'+"  p95 "+f'{q[94]:.1f}'+
+             "  p99 "+f'{q[98]:.1f}'+"  max "+f'{latencies[-1]:.1f}')
+      print ("   Request time (s): median "+f'{statistics.median(seconds):.3f}'+"  max "+f'{seconds[-1]:.3f}')
+      print ("   Throughput: "+f'{received/1048576:.1f}'+" MB total, "+
+             f'{received/1048576/wall:.1f}'+" MB/s aggregate, "+
+             f'{int(len(done)*count/wall):n}'+" numbers/s")
+   if (cache is not None):
+      print ("   "+cache.describe())
+   print()
+
+###########################################################################
+# Machine readable results.  A run is described by the host, the Python
+# version and the options used, plus one record per algorithm.  These can
+# be exported as JSON or CSV, and a JSON export serves as the baseline for
+# later runs to be compared against.
+
+def collectResults(timings, scaling, stats, invalid, memory):
+   import datetime
+   import statistics
+   import platform
+   records = []
+   for name in sorted(timings, key=lambda k:(timings[k], k)):
+      record = {"algorithm": name, "seconds": timings[name],
+                "valid": name not in invalid, "problem": invalid.get(name)}
+      if (name in stats):
+         samples = stats[name]
+         record["stats"] = {"runs": len(samples), "min": min(samples),
+                            "median": statistics.median(samples),
+                            "mean": statistics.mean(samples),
+                            "stdev": statistics.stdev(samples) if len(samples)>1 else 0.0,
+                            "samples": samples}
+      if (name in memory):
+         record["memory"] = memory[name]
+      if (name in scaling):
+         record["scaling"] = {str(workers): t for workers, t in scaling[name].items()}
+      records.append(record)
+   return({"host": platform.node(),
+           "platform": platform.platform(),
+           "python": platform.python_implementation()+" "+platform.python_version(),
+           "cpus": os.cpu_count(),
+           "date": datetime.datetime.now().isoformat(timespec="seconds"),
+           "options": settings(),
+           "results": records})
+
+def exportResults(path, run):
+   import csv
+   import json
+   if (path.lower().endswith(".csv")):
+      columns = ["algorithm", "seconds", "valid", "median", "stdev", "peak", "rss", "blocks",
+                 "blocksPerItem", "host", "python", "date", "max"]
+      with open(path, "w", newline="") as f:
+         writer = csv.writer(f)
+         writer.writerow(columns)
+         for r in run["results"]:
+            stats = r.get("stats", {})
+            memory = r.get("memory", {})
+            writer.writerow([r["algorithm"], r["seconds"], r["valid"], stats.get("median", ""),
+                             stats.get("stdev", ""), memory.get("peak", ""), memory.get("rss", ""),
+                             memory.get("blocks", ""), memory.get("blocksPerItem", ""), run["host"], run["python"], run["date"],
+                             run["options"]["MAX_NUMBERS"]])
+   else:
+      with open(path, "w") as f:
+         json.dump(run, f, indent=2)
+   print ("Results saved to "+path+"\n")
+
+# Compares a run with a baseline JSON export.  Reports every algorithm
+# found in both and returns the number whose time (or peak memory, when
+# both runs measured it) grew by more than threshold percent.  Benchmarked
+# times compare medians, and only count when the samples differ
+# significantly (see mannWhitney); single timings are too noisy to gate
+# on reliably, which is said.  Raises ValueError if the baseline isn't a
+# run export with the same range and rules.
+def compareResults(path, run, threshold):
+   import json
+   with open(path) as f:
+      baseline = json.load(f)
+   if ("options" not in baseline):
+      raise ValueError(path+" is not a run export (IE, it is from --batch)")
+   for name in ("MAX_NUMBERS", "START_NUMBER", "RULES"):
+      was = json.loads(json.dumps(baseline["options"].get(name)))
+      now = json.loads(json.dumps(run["options"][name]))
+      if (was!=now):
+         raise ValueError(path+" has "+name+" "+str(was)+", this run has "+str(now))
+   before = {r["algorithm"]: r for r in baseline["results"]}
+   print ("Compared with "+path+" ("+baseline["host"]+", "+baseline["python"]+", "+
+          f'{baseline["options"]["MAX_NUMBERS"]:n}'+" range, "+baseline["date"]+"):")
+   regressions = 0
+   single = False
+   for r in run["results"]:
+      old = before.get(r["algorithm"])
+      if (old is None):
+         continue
+      p = None
+      if ("stats" in old and "stats" in r):
+         checks = [("median", old["stats"]["median"], r["stats"]["median"])]
+         if ("samples" in old["stats"] and "samples" in r["stats"]):
+            p = mannWhitney(old["stats"]["samples"], r["stats"]["samples"])
+      else:
+         checks = [("time", old["seconds"], r["seconds"])]
+         single = True
+      if ("memory" in old and "memory" in r):
+         checks.append(("memory", old["memory"]["peak"], r["memory"]["peak"]))
+      for (what, was, now) in checks:
+         change = (now-was)/was*100 if was>0 else 0.0
+         flag = ""
+         if (change>threshold):
+            if (what=="median" and p is not None and p>=SIGNIFICANCE):
+               flag = "  (not significant, p="+f'{p:.2f}'+")"
+            else:
+               flag = "  REGRESSION"
+               regressions+=1
+         print ("   {0:15} {1:6}  {2:>+8.1f}%{3}".format(r["algorithm"], what, change, flag))
+   if (single):
+      print ("   Times without --bench in both runs are single samples; use --bench for a reliable gate.")
+   print ("   "+str(regressions)+" regression(s) past "+f'{threshold:g}'+"%.\n")
+   return(regressions)
+
+###########################################################################
+# Scaling sweep.  Which algorithm is fastest depends on the range, so this
+# times the algorithms over a geometric series of range sizes, fits each
+# one's time to a power law t = a*n^b (a straight line on log-log axes),
+# and reports which is fastest where, and where the rankings cross over.
+
+# The range sizes from low to high, multiplying by factor
+def sweepSizes(low, high, factor):
+   sizes = []
+   n = float(low)
+   while (round(n)<=high):
+      if (not sizes or round(n)!=sizes[-1]):
+         sizes.append(int(round(n)))
+      n*=factor
+   return(sizes)
+
+# Least squares fit of log(t) = log(a)+b*log(n).  Returns (a, b).
+def fitPowerLaw(points):
+   import statistics
+   xs = [math.log(n) for n, t in points]
+   ys = [math.log(t) for n, t in points]
+   mx, my = statistics.mean(xs), statistics.mean(ys)
+   sxx = sum((x-mx)**2 for x in xs)
+   b = sum((x-mx)*(y-my) for x, y in zip(xs, ys))/sxx if sxx>0 else 1.0
+   return((math.exp(my-b*mx), b))
+
+# Where two fitted curves meet, or None if they don't
+def crossover(fit1, fit2):
+   (a1, b1), (a2, b2) = fit1, fit2
+   if (b1==b2):
+      return(None)
+   logN = (math.log(a2)-math.log(a1))/(b1-b2)
+   return(math.exp(logN) if logN<700 else None)
+
+# Returns the algorithm whose fitted curve is fastest at range n
+def fastestFor(n, fits):
+   return(min(fits, key=lambda k: fits[k][0]*n**fits[k][1]))
+
+def sweep(algos, low, high, factor):
+   import csv
+   global MAX_NUMBERS, ANNOUNCE
+   sizes = sweepSizes(low, high, factor)
+   saved = (MAX_NUMBERS, ANNOUNCE)
+   ANNOUNCE = False
+   points = {name: [] for name in algos}
+   print ("Scaling sweep over "+str(len(sizes))+" range sizes, "+f'{sizes[0]:n}'+" to "+
+          f'{sizes[-1]:n}'+", fastest of "+str(SWEEP_REPEAT)+" run(s) each:")
+   print ("   {0:>14}".format("range")+"".join(" {0:>12}".format(name[:12]) for name in algos))
+   try:
+      for n in sizes:
+         MAX_NUMBERS = n
+         row = "   {0:>14n}".format(n)
+         for name in algos:
+            fizzy = optionsEngine().build(name)
+            if (fizzy.limit() is not None and n>fizzy.limit()):
+               row+=" {0:>12}".format("-")
+               continue
+            t = min(fizzy.measure() for i in range(SWEEP_REPEAT))
+            points[name].append((n, max(t, 1e-9)))
+            row+=" {0:>12.6f}".format(t)
+         print (row)
+   finally:
+      MAX_NUMBERS, ANNOUNCE = saved
+
+   fits = {name: fitPowerLaw(p) for name, p in points.items() if len(p)>1}
+   print ()
+   print ("Fitted time = a * n^b (b near 1 is linear):")
+   for name in sorted(fits, key=lambda k: fits[k][0]*sizes[-1]**fits[k][1]):
+      a, b = fits[name]
+      n, t = points[name][-1]
+      print ("   {0:15}  b = {1:5.2f}   {2:10.1f} ns/element at {3:n}".format(name, b, t/n*1e9, n))
+
+   print ()
+   print ("Fastest measured, by range:")
+   winners = []
+   for n in sizes:
+      timed = {name: t for name, p in points.items() for (m, t) in p if m==n}
+      if (timed):
+         winner = min(timed, key=timed.get)
+         if (not winners or winners[-1][1]!=winner):
+            winners.append((n, winner))
+   for i, (n, winner) in enumerate(winners):
+      upto = " up to "+f'{sizes[-1]:n}' if i+1==len(winners) else " until "+f'{winners[i+1][0]:n}'
+      print ("   from {0:n}{1}: {2}".format(n, upto, winner))
+
+   print ()
+   print ("Crossovers within the sweep (fitted):")
+   found = []
+   names = sorted(fits)
+   for i in range(len(names)):
+      for j in range(i+1, len(names)):
+         n = crossover(fits[names[i]], fits[names[j]])
+         # Only where both were actually measured
+         upper = min(points[names[i]][-1][0], points[names[j]][-1][0])
+         if (n is not None and sizes[0]<n<upper):
+            # Which one is faster beyond the crossover
+            faster, slower = (names[i], names[j]) if fits[names[i]][1]<fits[names[j]][1] else (names[j], names[i])
+            found.append((n, faster, slower))
+   for (n, faster, slower) in sorted(found):
+      print ("   {0:15} overtakes {1:15} at ~{2:n}".format(faster, slower, int(n)))
+   if (not found):
+      print ("   None")
+   print ()
+
+   # The pick for the run's own --max, from the fitted curves of the
+   # algorithms that can handle it
+   target = saved[0]
+   engine = optionsEngine()
+   limits = {name: engine.build(name).limit() for name in fits}
+   able = {name: fit for name, fit in fits.items() if limits[name] is None or target<=limits[name]}
+   if (able):
+      print ("Suggested for --max="+str(target)+": "+fastestFor(target, able)+
+             (" (extrapolated)" if not sizes[0]<=target<=sizes[-1] else "")+"\n")
+
+   if (SWEEP_DATA):
+      with open(SWEEP_DATA, "w", newline="") as f:
+         writer = csv.writer(f)
+         writer.writerow(["range", "algorithm", "seconds", "ns_per_element", "fitted_seconds"])
+         for name, p in points.items():
+            for (n, t) in p:
+               fitted = fits[name][0]*n**fits[name][1] if name in fits else ""
+               writer.writerow([n, name, t, t/n*1e9, fitted])
+      print ("Sweep data saved to "+SWEEP_DATA+"\n")
+   return(fits)
+
+###########################################################################
+# Batch runs.  A matrix file (JSON) lists algorithms, range sizes, starts
+# and rule sets; every combination is a job, IE:
+#    {"algorithms": ["Rules", "Pattern", "Generated"],
+#     "counts": [1000, 1000000], "starts": [1, 1000000000000000],
+#     "rules": [[[3, "Fizz"], [5, "Buzz"]], [[3, "Fizz"], [5, "Buzz"], [7, "Bazz"]]],
+#     "repeat": 5}
+# Only "counts" is required; the rest default to every algorithm, a start
+# of 1, the standard rules and 3 repeats.  Jobs run on a pool of worker
+# processes that stay up for the whole batch, each keeping an Engine (and
+# so its algorithms, compiled tables and generated code) per rule set, so
+# only the first job of a kind pays for setting up.  The biggest jobs are
+# handed out first, so the pool isn't left waiting on one long job at the
+# end.  The results come back as one report, ranked per range and rules.
+batchEngines = {}
+
+def batchInit():
+   global ANNOUNCE
+   ANNOUNCE = False
+
+# Runs one job in a worker: (algorithm, start, count, rules, repeat).
+# Returns the job with its samples, or with the reason it was skipped.
+def batchWork(job, verify):
+   name, start, count, rules, repeat = job
+   engine = batchEngines.get(rules)
+   if (engine is None):
+      engine = batchEngines[rules] = Engine(rules=rules)
+   try:
+      samples = engine.time(name, start, count, repeat)
+      if (verify):
+         got = plainBytes(engine.values(name, start, count))
+         if (got!=plainBytes(Query(RuleSet(rules)).range(start, start+count))):
+            return(job, None, "output differs from the reference")
+   except (ValueError, LookupError) as e:
+      return(job, None, str(e))
+   return(job, samples, None)
+
+# The jobs of a matrix, biggest first
+def batchJobs(matrix):
+   algos = [algorithmNamed(name) or name for name in matrix.get("algorithms", algorithms())]
+   ruleSets = [tuple((int(d), str(label)) for d, label in rules)
+               for rules in matrix.get("rules", [RULES])]
+   jobs = [(name, int(start), int(count), rules, int(matrix.get("repeat", 3)))
+           for name in algos
+           for start in matrix.get("starts", [1])
+           for count in matrix["counts"]
+           for rules in ruleSets]
+   return(sorted(jobs, key=lambda job: job[2], reverse=True))
+
+# Runs a batch matrix file across workers processes and prints the report.
+# Returns the results as {(start, count, rules): {algorithm: samples}}.
+def batch(path, workers):
+   import json
+   import statistics
+   from concurrent.futures import ProcessPoolExecutor, as_completed
+   with open(path) as f:
+      jobs = batchJobs(json.load(f))
+   print ("Batch: "+str(len(jobs))+" job(s) from "+path+" on "+str(workers)+" worker(s)")
+   groups = {}
+   skipped = []
+   busy = 0.0
+   begin = perf_counter()
+   with ProcessPoolExecutor(workers, initializer=batchInit) as pool:
+      pending = [pool.submit(batchWork, job, VERIFY) for job in jobs]
+      for done in as_completed(pending):
+         job, samples, problem = done.result()
+         name, start, count, rules, repeat = job
+         if (samples is None):
+            skipped.append((job, problem))
+            continue
+         busy+=sum(samples)
+         groups.setdefault((start, count, rules), {})[name] = samples
+   wall = perf_counter()-begin
+   print ("   Completed in "+f'{wall:<.3f}'+" seconds ("+f'{busy:<.3f}'+" seconds timed).\n")
+
+   # One ranking per range and rule set, on median time
+   best = {}
+   for (start, count, rules) in sorted(groups):
+      timings = {name: statistics.median(samples) for name, samples in groups[(start, count, rules)].items()}
+      fastest = min(timings.values())
+      print ("Range "+f'{start:n}'+".."+f'{start+count-1:n}'+" ("+f'{count:n}'+"), rules "+
+             ",".join(str(d)+":"+label for d, label in rules)+":")
+      for i, (name, t) in enumerate(sorted(timings.items(), key=lambda kv:(kv[1], kv[0]))):
+         print("   {0:3}. {1:15}  @  {2:<10.6f} seconds  x{3:<.2f}".format(
+            i+1, name, t, t/fastest if fastest>0 else 1.0))
+         best.setdefault(name, []).append(t/fastest if fastest>0 else 1.0)
+      print ()
+
+   # Overall, by the geometric mean of time relative to the fastest, over
+   # the groups each algorithm ran in
+   print ("Overall (geometric mean of time relative to the fastest):")
+   overall = {name: math.exp(statistics.mean(math.log(r) for r in ratios))
+              for name, ratios in best.items()}
+   for i, (name, r) in enumerate(sorted(overall.items(), key=lambda kv:(kv[1], kv[0]))):
+      print("   {0:3}. {1:15}  x{2:<8.2f} in {3} of {4} group(s)".format(
+         i+1, name, r, len(best[name]), len(groups)))
+   if (skipped):
+      print ()
+      print ("Skipped:")
+      for (name, start, count, rules, repeat), problem in sorted(skipped):
+         print("        {0:15}  {1:n}+{2:n}, rules {3}: {4}".format(
+            name, start, count, ",".join(str(d)+":"+label for d, label in rules), problem))
+   print ()
+   if (EXPORT_FILE):
+      exportBatch(EXPORT_FILE, groups, overall)
+   return(groups)
+
+# Saves a batch's timings, one row per algorithm, range and rule set
+def exportBatch(path, groups, overall):
+   import csv
+   import datetime
+   import json
+   import statistics
+   rows = [{"algorithm": name, "start": start, "count": count,
+            "rules": ",".join(str(d)+":"+label for d, label in rules),
+            "median": statistics.median(samples), "samples": samples}
+           for (start, count, rules), timings in sorted(groups.items())
+           for name, samples in sorted(timings.items())]
+   if (path.lower().endswith(".csv")):
+      with open(path, "w", newline="") as f:
+         writer = csv.writer(f)
+         writer.writerow(["algorithm", "start", "count", "rules", "median", "relative"])
+         for row in rows:
+            writer.writerow([row["algorithm"], row["start"], row["count"], row["rules"],
+                             row["median"], overall[row["algorithm"]]])
+   else:
+      import platform
+      with open(path, "w") as f:
+         json.dump({"host": platform.node(),
+                    "python": platform.python_implementation()+" "+platform.python_version(),
+                    "cpus": os.cpu_count(),
+                    "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "results": rows, "overall": overall}, f, indent=2)
+   print ("Results saved to "+path+"\n")
+
+###########################################################################
+# Isolated execution.  All algorithms normally run one after another in the
+# same interpreter, where they affect each other: Recursive raises the
+# recursion limit for the rest of the run, and heap and GC state left
+# over from earlier huge lists carries into later timings.  In isolated
+# mode each algorithm runs in a brand new spawned interpreter with
+# identical startup state (optionally pinned to a CPU), which returns its
+# timings and metrics to the parent.
+
+# The current options, as a dict that can be pickled to a worker
+def settings():
+   return({name: globals()[name] for name in OPTIONS})
+
+# Runs in the worker process.  Returns (elapsed, scaling, stats, invalid,
+# memory, phases) for the algorithm, as main() would have recorded them.
+def isolatedRun(name, options, cpu):
+   import locale
+   locale.setlocale(locale.LC_ALL, '')
+   globals().update(options)
+   if (cpu is not None and hasattr(os, "sched_setaffinity")):
+      os.sched_setaffinity(0, {cpu})
+   scaling, stats, invalid, memory, phases = {}, {}, {}, {}, {}
+   fizzy = construct(name)
+   elapsed = execute(fizzy, scaling, stats, memory)
+   check(fizzy, invalid)
+   if (fizzy.phases):
+      phases[name] = fizzy.phases
+   sys.stdout.flush()
+   return((elapsed, scaling, stats, invalid, memory, phases))
+
+# Runs one algorithm in a fresh process and returns what it recorded
+def isolate(name, cpu=None):
+   from concurrent.futures import ProcessPoolExecutor
+   import multiprocessing
+   context = multiprocessing.get_context("spawn")
+   with ProcessPoolExecutor(1, mp_context=context) as pool:
+      return(pool.submit(isolatedRun, name, settings(), cpu).result())
+
+###########################################################################
+# Every registered algorithm, by class name.  Vectorized needs NumPy.
+def algorithms():
+   algos = ["FizzBuzz",
+            "Sieve",    "Minefield",   "Dictionary",
+            "Lambda",   "Recursive",   "Nested",
+            "Unrolled", "Racers",      "Pattern",
+            "Rules",    "Stamper",     "Generated",
+            "SieveLean", "NestedLean", "RacersLean", "PatternLean"]
+   if (importlib.util.find_spec("numpy") is not None):
+      algos.append("Vectorized")
+   return(algos)
+
+# The registered algorithm called name, in any case, or None
+def algorithmNamed(name):
+   for algo in algorithms():
+      if (algo.lower()==name.lower()):
+         return(algo)
+   return(None)
+
+###########################################################################
+# Library interface.  Runs any registered algorithm over any range, with
+# the rules, storage and output sink passed in rather than taken from the
+# command line options, and prints nothing of its own.  Every setting an
+# algorithm uses is handed to its constructor, so nothing depends on the
+# options; the command line builds its algorithms through an Engine too
+# (see optionsEngine()).  Each algorithm is
+# constructed once per engine and reused, so a long-lived process can
+# make many small calls without paying for setup again.  Given a
+# RangeCache, values are kept between calls too, and repeated or
+# overlapping windows only compute what the cache doesn't hold.  IE:
+#    from FizzBuzz import Engine, RangeCache
+#    engine = Engine(rules=((3, "Fizz"), (5, "Buzz"), (7, "Bazz")))
+#    engine.values("Generated", 1, 105)
+#    engine.write("Stamper", 10**15, 10**6, open("out.txt", "wb"), indexed=False)
+#    cached = Engine(cache=RangeCache(budget=64*1048576))
+class Engine():
+   def __init__(self, rules=None, compact=False, chunkSize=CHUNK_SIZE, unroll=UNROLL, cache=None,
+                start=1, count=100, indexed=True, profile="", recursionLimit=RECURSION_LIMIT):
+      self.ruleSet = RuleSet(rules) if rules is not None else None
+      self.chunkSize = max(chunkSize-chunkSize%15, 15)
+      self.cache = cache
+      self.settings = {"start": start, "count": count, "compact": compact,
+                       "chunkSize": self.chunkSize, "unroll": unroll, "indexed": indexed,
+                       "profile": profile, "recursionLimit": recursionLimit,
+                       "rules": self.ruleSet.rules if rules is not None else RuleSet().rules}
+      self.algos = {}
+
+   # A new instance of the algorithm called name (in any case), with this
+   # engine's settings, readied for its range
+   def build(self, name):
+      canonical = algorithmNamed(name)
+      if (canonical is None):
+         raise LookupError("Unknown algorithm: "+name)
+      fizzy = globals()[canonical](**self.settings)
+      fizzy.prepare(fizzy.size())
+      return(fizzy)
+
+   # The algorithm called name (in any case), built on first use
+   def algorithm(self, name):
+      canonical = algorithmNamed(name)
+      fizzy = self.algos.get(canonical)
+      if (fizzy is None):
+         fizzy = self.build(name)
+         if (self.ruleSet is not None and self.ruleSet.rules!=fizzy.rules().rules):
+            raise ValueError(fizzy.myName()+" only implements the standard rules")
+         self.algos[canonical] = fizzy
+      return(fizzy)
+
+   # The algorithm called name, readied for count numbers
+   def ready(self, name, count):
+      fizzy = self.algorithm(name)
+      if (fizzy.limit() is not None and count>fizzy.limit()):
+         raise ValueError(fizzy.myName()+" is limited to "+str(fizzy.limit())+" numbers")
+      fizzy.prepare(count)
+      return(fizzy)
+
+   # The values of count numbers from start, as an indexable sequence (a
+   # list, or a FizzBuzzResult in compact mode)
+   def values(self, name, start, count):
+      values = self.results(name, start, count)
+      return(list(values) if isinstance(values, Stamped) else values)
+
+   # As values(), but as the algorithm produced them, which for Stamper
+   # is the rendered text (see Stamped)
+   def results(self, name, start, count):
+      if (count<=0):
+         return([])
+      if (self.cache is not None):
+         fizzy = self.algorithm(name)
+         return(self.cache.range((fizzy.myName(), fizzy.rules().rules), start, start+count,
+                                 lambda low, high: self.compute(name, low, high)))
+      return(self.ready(name, count).window(start, start+count-1))
+
+   # The values of low..high for the cache, in pieces no bigger than the
+   # algorithm's limit
+   def compute(self, name, low, high):
+      return(self.algorithm(name).span(low, high, self.chunkSize))
+
+   # Times the algorithm over count numbers from start, repeat times, and
+   # returns the samples in seconds (doFizzBuzz() alone, as in --bench)
+   def time(self, name, start, count, repeat=1):
+      fizzy = self.ready(name, max(count, 1))
+      fizzy.Start, fizzy.Max = start, start+max(count, 1)-1
+      return([fizzy.measure() for i in range(repeat)])
+
+   # The values of count numbers from start, a chunk at a time
+   def chunks(self, name, start, count):
+      for low in range(start, start+count, self.chunkSize):
+         yield self.values(name, low, min(self.chunkSize, start+count-low))
+
+   # Writes count numbers from start to sink (anything with a write()
+   # taking bytes), indexed or plain, and returns the bytes written
+   def write(self, name, start, count, sink, indexed=True):
+      fizzy = self.algorithm(name)
+      if (hasattr(fizzy, "indexed")):
+         fizzy.indexed = indexed
+      written = 0
+      for low in range(start, start+count, self.chunkSize):
+         chunk = self.results(name, low, min(self.chunkSize, start+count-low))
+         data = formatBlock(chunk, low, indexed)
+         sink.write(data)
+         written+=len(data)
+      return(written)
+
+#End of class
+
+# An Engine with the command line options as its settings
+def optionsEngine():
+   return(Engine(rules=RULES, compact=COMPACT, chunkSize=CHUNK_SIZE, unroll=UNROLL,
+                 start=START_NUMBER, count=MAX_NUMBERS, indexed=(OUTPUT_FORMAT=="indexed"),
+                 profile=PROFILE, recursionLimit=RECURSION_LIMIT))
+
 ###########################################################################
 def showHelp():
    print ("FizzBuzz v1.0 May 2020 Karim Sultan (karimsultan@hotmail.com)")
    print ()
-   print ("Syntax: python3 fizzbuzz.py --max=number [--algo=name] [--verbose=[true|false]] [--help]")
+   print ("Syntax: python3 fizzbuzz.py --max=number [--start=number] [--algo=name] [--verbose=[true|false]] [--stream [--chunk=number]] [--workers=n[,n...]] [--compact] [--output=file] [--format=[indexed|plain]]")
+   print ("                          [--bench [--warmup=number] [--repeat=number]] [--verify]")
+   print ("                          [--query=n|start:stop] [--memory] [--rules=d:label,...]")
+   print ("                          [--serve=port] [--load=clients [--read-delay=seconds]] [--cache=MB]")
+   print ("                          [--isolate [--pin=cpu]]")
+   print ("                          [--export=file] [--compare=file [--threshold=percent]]")
+   print ("                          [--sweep=low:high[:factor] [--sweep-data=file]]")
+   print ("                          [--profile=[phases|cprofile|sample]]")
+   print ("                          [--checkpoint=file [--checkpoint-every=seconds] [--resume]]")
+   print ("                          [--unroll=number] [--store=file] [--gc=[freeze|disable]]")
+   print ("                          [--batch=file [--workers=n] [--verify]] [--help]")
    print ()
    print ("Where:")
    print ("-h,    --help: This help screen")
    print ("-m,     --max: # -> Amount of numbers to FizzBuzz, default is 100. IE, --max=200")
+   print ("       --count: # -> Same as --max")
+   print ("       --start: # -> First number to FizzBuzz, of any size.  Default is 1.  IE, --start=1000000000000000")
    print ("-a,    --algo: name -> The name of a specific algorithm to test.  IE, --algo=Racers")
    print ("-v, --verbose: true | false -> show output.  Default is true.  IE, --verbose=false")
+   print ("-s,  --stream: Produce and consume results in chunks, keeping memory flat")
+   print ("       --chunk: # -> Streaming chunk size, rounded to a multiple of 15.  Default is 300000")
+   print ("-w, --workers: #[,#...] -> Shard chunks across a process pool of each size.  IE, --workers=1,4,8")
+   print ("-c, --compact: Store results at one byte per entry instead of a Python list")
+   print ("-o,  --output: file -> Write results to a file instead of the console.  IE, --output=out.txt")
+   print ("-f,  --format: indexed | plain -> \"[n] value\" lines or bare values.  Default is indexed")
+   print ("-b,   --bench: Benchmark: repeat each algorithm and rank on median, with statistics")
+   print ("      --warmup: # -> Untimed runs before measuring.  Default is 1")
+   print ("      --repeat: # -> Timed runs.  Default is 0, which calibrates to about 1 second")
+   print ("      --verify: Check output against the reference; failures are left out of the rankings")
+   print ("-q,   --query: n | start:stop -> Look up a value or window directly, without running algorithms")
+   print ("      --memory: Record peak memory, allocated blocks (also per item) and GC collections")
+   print ("                (inflates timings)")
+   print ("-r,   --rules: d:label[,d:label...] -> Rules for the Rules algorithm and queries.  IE, --rules=3:Fizz,5:Buzz,7:Bazz")
+   print ("       --serve: port -> Stream ranges over HTTP on localhost.  IE, --serve=8015, then")
+   print ("                GET /?start=1&count=1000&algo=Pattern&format=plain")
+   print ("        --load: # -> Load test an in-process server with this many clients of --max numbers each")
+   print ("  --read-delay: seconds -> Pause between reads of each load client, to simulate slow readers")
+   print ("       --cache: MB -> Keep windows computed by --serve or --load, up to this much, for later")
+   print ("                requests to reuse, and report hits, misses and evictions.  IE, --cache=256")
+   print ("-i, --isolate: Run each algorithm in a fresh interpreter, so runs can't affect each other")
+   print ("         --pin: cpu -> Pin isolated runs to this CPU (Linux).  IE, --pin=2")
+   print ("-e,   --export: file -> Save results with host and options, as CSV if file ends in .csv, else JSON")
+   print ("      --compare: file -> Compare with a JSON baseline; exit code 1 on regressions")
+   print ("    --threshold: % -> Slowdown (or memory growth) that counts as a regression.  Default is 10")
+   print ("       --sweep: low:high[:factor] -> Time over a geometric series of ranges and find crossovers.")
+   print ("                Default factor is 10.  IE, --sweep=100:10000000:4")
+   print ("  --sweep-data: file -> Save the sweep's points and fitted curves as CSV, for plotting")
+   print ("-p,  --profile: phases | cprofile | sample -> Time setup, compute, report and algorithm phases")
+   print ("                separately; cprofile and sample also profile the compute phase")
+   print ("   --checkpoint: file -> Stream, saving progress to file so an interrupted run can be resumed")
+   print ("   --checkpoint-every: seconds -> Time between checkpoints.  Default is 10")
+   print ("       --resume: Carry on from the checkpoint file instead of starting over")
+   print ("       --unroll: # -> Block size for the Generated algorithm, rounded up to whole periods of")
+   print ("                the rules.  Default is 90.  IE, --unroll=300")
+   print ("        --store: file -> Store results in a memory-mapped file, in parallel slices with --workers;")
+   print ("                with --query, read them back from it instead.  IE, --store=run.fzb")
+   print ("           --gc: freeze | disable -> Freeze the objects so far out of the garbage collector's")
+   print ("                reach, or switch it off, while measuring.  IE, --gc=freeze")
+   print ("        --batch: file -> Run a JSON matrix of algorithms, counts, starts and rules on a pool of")
+   print ("                --workers processes (default one per CPU), and rank them.  IE, --batch=jobs.json")
    print ()
    exit(0)
 
 
 def parseCommandLine():
+   import getopt
    argc = len(sys.argv)
    try:
-      opts, args = getopt.getopt(sys.argv[1:], "?hm:v:a:", ["max=","help","algo=","verbose="])
+      opts, args = getopt.getopt(sys.argv[1:], "?hm:v:a:sw:co:f:bq:r:ie:p:",
+                                 ["max=","count=","start=","help","algo=","verbose=","stream","chunk=","workers=",
+                                  "compact","output=","format=","bench","warmup=","repeat=",
+                                  "verify","query=","memory","rules=","serve=","load=",
+                                  "read-delay=","isolate","pin=","export=","compare=",
+                                  "threshold=","sweep=","sweep-data=","profile=",
+                                  "checkpoint=","checkpoint-every=","resume","unroll=","store=","gc=","batch=","cache="])
    except getopt.GetoptError as e:
       print("Arguments error:",e.msg,e.opt)
       showHelp()
@@ -558,10 +2959,14 @@ def parseCommandLine():
       if (opt in ("-?", "-h", "--help")):
          showHelp()
 
-      if (opt in ("-m", "--max")):
+      if (opt in ("-m", "--max", "--count")):
          global MAX_NUMBERS
          x=int(arg)
-         MAX_NUMBERS = max(x,100)
+         MAX_NUMBERS = max(x,1)
+
+      if (opt in ("--start",)):
+         global START_NUMBER
+         START_NUMBER = max(int(arg),1)
 
       if (opt in ("-v", "--verbose")):
          global VERBOSE
@@ -572,31 +2977,356 @@ def parseCommandLine():
 
       if (opt in ("-a", "--algo")):
          global ALGO_REQUESTED
-         arg=arg.capitalize()
-         ALGO_REQUESTED=arg
+         ALGO_REQUESTED=algorithmNamed(arg) or arg
+
+      if (opt in ("-s", "--stream")):
+         global STREAM
+         STREAM = True
+
+      if (opt in ("--chunk",)):
+         global CHUNK_SIZE
+         x=int(arg)
+         CHUNK_SIZE = max(x-x%15, 15)
+
+      if (opt in ("-w", "--workers")):
+         global WORKERS
+         WORKERS = sorted(set(max(int(x),1) for x in arg.split(",")))
 
+      if (opt in ("-c", "--compact")):
+         global COMPACT
+         COMPACT = True
 
-def displayTimings(timings):
+      if (opt in ("-o", "--output")):
+         global OUTPUT_FILE
+         OUTPUT_FILE = arg
+
+      if (opt in ("-f", "--format")):
+         global OUTPUT_FORMAT
+         if (arg.lower()=="plain"):
+            OUTPUT_FORMAT = "plain"
+         else:
+            OUTPUT_FORMAT = "indexed"
+
+      if (opt in ("-b", "--bench")):
+         global BENCHMARK
+         BENCHMARK = True
+
+      if (opt in ("--warmup",)):
+         global WARMUP
+         WARMUP = max(int(arg), 0)
+
+      if (opt in ("--repeat",)):
+         global REPEAT
+         REPEAT = max(int(arg), 0)
+
+      if (opt in ("--verify",)):
+         global VERIFY
+         VERIFY = True
+
+      if (opt in ("-q", "--query")):
+         global QUERY
+         bounds=arg.split(":")
+         first=int(bounds[0])
+         QUERY=(first, int(bounds[1]) if len(bounds)>1 else first+1)
+
+      if (opt in ("--memory",)):
+         global MEMORY
+         MEMORY = True
+
+      if (opt in ("-r", "--rules")):
+         global RULES
+         RULES = tuple((int(d), label) for d, label in
+                       (rule.split(":", 1) for rule in arg.split(",")))
+
+      if (opt in ("--serve",)):
+         global SERVE_PORT
+         SERVE_PORT = int(arg)
+
+      if (opt in ("--load",)):
+         global LOAD_CLIENTS
+         LOAD_CLIENTS = max(int(arg), 0)
+
+      if (opt in ("--read-delay",)):
+         global LOAD_DELAY
+         LOAD_DELAY = max(float(arg), 0.0)
+
+      if (opt in ("--cache",)):
+         global CACHE_SIZE
+         CACHE_SIZE = max(float(arg), 0.0)
+
+      if (opt in ("-i", "--isolate")):
+         global ISOLATE
+         ISOLATE = True
+
+      if (opt in ("--pin",)):
+         global PIN_CPU
+         PIN_CPU = int(arg)
+
+      if (opt in ("-e", "--export")):
+         global EXPORT_FILE
+         EXPORT_FILE = arg
+
+      if (opt in ("--compare",)):
+         global COMPARE_FILE
+         COMPARE_FILE = arg
+
+      if (opt in ("--threshold",)):
+         global THRESHOLD
+         THRESHOLD = float(arg)
+
+      if (opt in ("--sweep",)):
+         global SWEEP
+         bounds=arg.split(":")
+         SWEEP=(max(int(bounds[0]), 1), int(bounds[1]),
+                float(bounds[2]) if len(bounds)>2 else 10.0)
+         if (SWEEP[2]<=1):
+            print ("The sweep factor must be greater than 1.")
+            exit(0)
+
+      if (opt in ("--sweep-data",)):
+         global SWEEP_DATA
+         SWEEP_DATA = arg
+
+      if (opt in ("-p", "--profile")):
+         global PROFILE
+         PROFILE = arg.lower()
+         if (PROFILE not in ("phases", "cprofile", "sample")):
+            print ("Unknown profile mode:", arg)
+            exit(0)
+
+      if (opt in ("--checkpoint",)):
+         global CHECKPOINT_FILE
+         CHECKPOINT_FILE = arg
+         STREAM = True
+
+      if (opt in ("--checkpoint-every",)):
+         global CHECKPOINT_EVERY
+         CHECKPOINT_EVERY = max(float(arg), 0.0)
+
+      if (opt in ("--resume",)):
+         global RESUME
+         RESUME = True
+
+      if (opt in ("--unroll",)):
+         global UNROLL
+         UNROLL = max(int(arg), 1)
+
+      if (opt in ("--store",)):
+         global STORE_FILE
+         STORE_FILE = arg
+
+      if (opt in ("--batch",)):
+         global BATCH_FILE
+         BATCH_FILE = arg
+
+      if (opt in ("--gc",)):
+         global GC_MODE
+         GC_MODE = arg.lower()
+         if (GC_MODE not in ("freeze", "disable")):
+            print ("Unknown gc mode:", arg)
+            exit(0)
+
+
+# Mann-Whitney U test (normal approximation, tie corrected).  Returns the
+# two-sided p-value that samples a and b come from the same distribution.
+# Makes no assumption about the shape of timing distributions, which are
+# usually skewed by the occasional slow run.
+def mannWhitney(a, b):
+   import statistics
+   pooled = sorted([(x, 0) for x in a]+[(x, 1) for x in b])
+   n1, n2 = len(a), len(b)
+   n = n1+n2
+   rankSum = 0.0
+   ties = 0
+   i = 0
+   while (i<n):
+      j = i
+      while (j+1<n and pooled[j+1][0]==pooled[i][0]):
+         j+=1
+      rank = (i+j)/2+1
+      rankSum += rank*sum(1 for k in range(i, j+1) if pooled[k][1]==0)
+      ties += (j-i+1)**3-(j-i+1)
+      i = j+1
+   u = rankSum-n1*(n1+1)/2
+   sigma = math.sqrt(n1*n2/12*((n+1)-ties/(n*(n-1)))) if n>1 else 0.0
+   if (sigma==0):
+      return(1.0)
+   z = max(abs(u-n1*n2/2)-0.5, 0)/sigma
+   return(2*(1-statistics.NormalDist().cdf(z)))
+
+# Scaling maps algorithm name to {workers: seconds} for sharded runs.
+# Speedup and efficiency are relative to the smallest worker count.
+# Stats maps algorithm name to benchmark samples; rankings that are not
+# statistically different from the one above are flagged with "~".
+# Invalid maps algorithm name to the reason it failed verification; those
+# are left out of the rankings, since they didn't do the same work.
+# Memory maps algorithm name to MemoryProbe measurements, shown as columns.
+def displayTimings(timings, scaling=None, stats=None, invalid=None, memory=None):
+   import statistics
    # Print ranked timings
    print()
    print ("Ranked Timings: ("+f'{MAX_NUMBERS:n}'+ " range)")
+   if (memory):
+      print("   {0:44}{1:>11} {2:>11} {3:>14} {4:>11} {5:>11} {6:>14}".format(
+         "", "peak MB", "RSS MB", "net blocks", "blocks/item", "peak B/item", "gc (0/1/2)"))
    i=0
+   previous=None
    for (k,v) in sorted(timings.items(), key=lambda kv:(kv[1],kv[0])):
+      if (invalid and k in invalid):
+         continue
       i+=1
-      print("   {0:3}. {1:15}  @  {2:<10.6f} seconds".format(i, k, v))
+      flag=""
+      if (stats and previous in stats and k in stats):
+         p = mannWhitney(stats[previous], stats[k])
+         if (p>=SIGNIFICANCE):
+            flag="  ~ #"+str(i-1)+" (p="+f'{p:.2f}'+")"
+      columns=""
+      if (memory and k in memory):
+         m = memory[k]
+         columns = " {0:>11.1f} {1:>11.1f} {2:>14n} {3:>11.2f} {4:>11.1f} {5:>14}".format(
+            m["peak"]/1048576, m["rss"]/1048576, m["blocks"], m["blocksPerItem"],
+            m["peakPerItem"], "/".join(map(str, m["collections"])))
+      print("   {0:3}. {1:15}  @  {2:<10.6f} seconds{3}{4}".format(i, k, v, columns, flag))
+      previous=k
+      if (stats and k in stats):
+         samples = stats[k]
+         if (len(samples)>1):
+            q = statistics.quantiles(samples, n=4)
+            spread = (statistics.stdev(samples), q[2]-q[0])
+         else:
+            spread = (0.0, 0.0)
+         print("        min {0:.6f}  median {1:.6f}  mean {2:.6f}  stdev {3:.6f}  IQR {4:.6f}  (n={5})".format(
+            min(samples), statistics.median(samples), statistics.mean(samples),
+            spread[0], spread[1], len(samples)))
+      if (scaling and k in scaling):
+         runs = scaling[k]
+         base = min(runs)
+         print("        {0:>8} {1:>12} {2:>9} {3:>11}   (relative to {4} worker(s))".format(
+            "workers", "seconds", "speedup", "efficiency", base))
+         for workers in sorted(runs):
+            speedup = runs[base]/runs[workers] if runs[workers]>0 else 0.0
+            print("        {0:>8} {1:>12.6f} {2:>8.2f}x {3:>10.1%}".format(
+               workers, runs[workers], speedup, speedup*base/workers))
+   if (invalid):
+      print()
+      print ("Excluded (failed verification or not measured):")
+      for (k,v) in sorted(invalid.items()):
+         print("        {0:15}  {1}".format(k, v))
+   print()
+
+
+# Runs a freshly constructed algorithm in the selected mode and
+# returns its elapsed time.  Sharded runs record every worker count in
+# scaling and return the best; benchmarks record their samples in stats
+# and return the median.  With --memory, the run is instrumented and the
+# measurements recorded in memory.
+def execute(fizzy, scaling, stats, memory):
+   import statistics
+   probe = MemoryProbe() if (MEMORY==True) else None
+   profiler = None
+   if (PROFILE=="cprofile"):
+      import cProfile
+      profiler = cProfile.Profile()
+   elif (PROFILE=="sample"):
+      profiler = Sampler()
+   # GC control goes outside the probe, so its collection isn't counted
+   # as the algorithm's allocations
+   with GCControl(GC_MODE):
+      if (probe is not None):
+         probe.start()
+      if (PROFILE=="cprofile"):
+         profiler.enable()
+      elif (PROFILE=="sample"):
+         profiler.start()
+      elapsed = None
+      with fizzy.phase("compute"):
+         if (BENCHMARK==True):
+            samples = stats[fizzy.myName()] = fizzy.benchmark(WARMUP, REPEAT)
+            elapsed = statistics.median(samples)
+         elif (STORE_FILE):
+            elapsed = fizzy.store(STORE_FILE, max(WORKERS or [1]))
+         elif (WORKERS):
+            runs = {}
+            for workers in WORKERS:
+               runs[workers]=fizzy.shard(workers)
+            elapsed = min(runs.values())
+            # An aborted run (a shard window past the limit) has no scaling
+            if (fizzy.limit() is None or min(fizzy.chunkSize, fizzy.size())<=fizzy.limit()):
+               scaling[fizzy.myName()] = runs
+         elif (STREAM==True):
+            elapsed = fizzy.stream()
+         else:
+            fizzy.run()
+      if (PROFILE=="cprofile"):
+         profiler.disable()
+      elif (PROFILE=="sample"):
+         profiler.stop()
+      if (probe is not None):
+         memory[fizzy.myName()]=probe.stop(fizzy.size())
+   if (elapsed is None):
+      with fizzy.phase("report"):
+         elapsed = fizzy.report()
+   if (PROFILE=="cprofile"):
+      import pstats
+      print ("   cProfile, top "+str(PROFILE_TOP)+" by internal time:")
+      pstats.Stats(profiler, stream=sys.stdout).sort_stats("tottime").print_stats(PROFILE_TOP)
+   elif (PROFILE=="sample"):
+      profiler.show(PROFILE_TOP)
+   return(elapsed)
+
+# Constructs an algorithm by class name, timing its setup as a phase
+def construct(name):
+   resetPeakRSS()
+   tick = perf_counter()
+   fizzy = optionsEngine().build(name)
+   if (PROFILE):
+      fizzy.charge("setup", perf_counter()-tick)
+   if (ANNOUNCE==True):
+      print(fizzy.Name+" (now executing...)")
+   return(fizzy)
+
+
+# Prints the time spent in each phase per algorithm, as a table
+def displayPhases(phases):
+   names = ["setup", "compute", "report"]
+   for recorded in phases.values():
+      names += [name for name in recorded if name not in names]
+   print ("Phase Timings: (seconds)")
+   print ("   {0:15}".format("")+"".join(" {0:>10}".format(name[:10]) for name in names))
+   for (k, recorded) in sorted(phases.items()):
+      print ("   {0:15}".format(k)+"".join(
+         " {0:>10.6f}".format(recorded[name]) if name in recorded else " {0:>10}".format("-")
+         for name in names))
    print()
 
+# Verifies an algorithm's output when requested, after it has been timed.
+# Failures, and runs that excluded themselves (IE, a failed store), are
+# recorded in invalid.
+def check(fizzy, invalid):
+   if (fizzy.excluded is not None):
+      invalid[fizzy.myName()]=fizzy.excluded
+      return
+   if (VERIFY==False):
+      return
+   problem = fizzy.verify()
+   if (problem is not None):
+      print ("   Verification failed: "+problem+"\n")
+      invalid[fizzy.myName()]=problem
+
 
 def main():
+   import locale
    # Immediately set locale using auto; this ensures proper numeric output.
    locale.setlocale(locale.LC_ALL, '')
 
    # Variables
-   algos = ["FizzBuzz",
-            "Sieve",    "Minefield",   "Dictionary",
-            "Lambda",   "Recursive",   "Nested",
-            "Unrolled", "Racers",      "Pattern"]
+   algos = algorithms()
    timings=dict()
+   scaling=dict()
+   stats=dict()
+   invalid=dict()
+   memory=dict()
+   phases=dict()
 
    parseCommandLine()
 
@@ -607,31 +3337,119 @@ def main():
         print ("Valid choices are:",algos)
         exit(0)
 
-   print("Using a maximum number range of: "+f'{MAX_NUMBERS:n}')
+   # Queries are answered directly from the 15-cycle, or read back from
+   # a store filled by an earlier run
+   if (QUERY is not None):
+      if (OUTPUT_FILE):
+         open(OUTPUT_FILE, "wb").close()
+      renderer = openRenderer()
+      if (STORE_FILE):
+         try:
+            with FizzBuzzStore(STORE_FILE) as store:
+               renderer.write(store.range(*QUERY), QUERY[0])
+         except (OSError, ValueError, IndexError) as e:
+            print ("Cannot read store:", e)
+      else:
+         renderer.write(Query(RuleSet(RULES)).range(*QUERY), QUERY[0])
+      renderer.close()
+      return
+
+   # Server and load generator modes run until done, then exit, keeping
+   # computed windows in a cache of CACHE_SIZE MB if asked to
+   if (SERVE_PORT is not None or LOAD_CLIENTS>0):
+      import asyncio
+   cache = RangeCache(CACHE_SIZE*1048576, CACHE_BLOCK) if CACHE_SIZE>0 else None
+   if (SERVE_PORT is not None):
+      global ANNOUNCE
+      ANNOUNCE = False
+      try:
+         asyncio.run(serve(SERVE_PORT, cache))
+      except KeyboardInterrupt:
+         pass
+      if (cache is not None):
+         print (cache.describe())
+      return
+   if (LOAD_CLIENTS>0):
+      ANNOUNCE = False
+      algo = ALGO_REQUESTED if ALGO_REQUESTED!="*" else "Rules"
+      asyncio.run(loadTest(LOAD_CLIENTS, MAX_NUMBERS, algo, LOAD_DELAY, cache))
+      return
+
+   # A batch runs its own matrix of jobs
+   if (BATCH_FILE):
+      batch(BATCH_FILE, max(WORKERS or [os.cpu_count() or 1]))
+      return
+
+   print("Using a maximum number range of: "+f'{MAX_NUMBERS:n}'+
+         (" from "+f'{START_NUMBER:n}' if START_NUMBER!=1 else ""))
+
+   # Start with an empty output file; each algorithm appends to it.
+   # A resumed run keeps it, and the checkpoint, and carries on.
+   if (CHECKPOINT_FILE and RESUME==False and os.path.exists(CHECKPOINT_FILE)):
+      os.remove(CHECKPOINT_FILE)
+   if (RESUME==True):
+      if (not CHECKPOINT_FILE or not os.path.exists(CHECKPOINT_FILE)):
+         print ("Nothing to resume: no checkpoint file.")
+         exit(0)
+      try:
+         Checkpoint(CHECKPOINT_FILE)
+      except ValueError as e:
+         print ("Cannot resume:", e)
+         exit(0)
+   elif (OUTPUT_FILE and VERBOSE==True):
+      open(OUTPUT_FILE, "wb").close()
 
    # Use a cool trick to load class by name from list
    # Execute fizzbuzz, report, and track time taken.
    # The generic logic / method calls works well as
    # each algorithm is a sublass of the FizzBuzz class
-   if (ALGO_REQUESTED=="*"):
-      for algo in range(len(algos)):
-         klass = globals()[algos[algo]]
-         fizzy=klass()
-         fizzy.doFizzBuzz()
-         timings[fizzy.myName()]=fizzy.report()
-   else:
-      klass = globals()[ALGO_REQUESTED]
-      fizzy=klass()
-      fizzy.doFizzBuzz()
-      timings[fizzy.myName()]=fizzy.report()
+   if (ALGO_REQUESTED!="*"):
+      algos = [ALGO_REQUESTED]
+
+   # A sweep replaces the single-range run
+   if (SWEEP is not None):
+      sweep(algos, *SWEEP)
+      return
+
+   for algo in range(len(algos)):
+      if (ISOLATE==True):
+         # Same run, in its own interpreter
+         sys.stdout.flush()
+         results = isolate(algos[algo], PIN_CPU)
+         timings[algos[algo]]=results[0]
+         for (merged, recorded) in zip((scaling, stats, invalid, memory, phases), results[1:]):
+            merged.update(recorded)
+         continue
+      fizzy=construct(algos[algo])
+      timings[fizzy.myName()]=execute(fizzy, scaling, stats, memory)
+      check(fizzy, invalid)
+      if (fizzy.phases):
+         phases[fizzy.myName()]=fizzy.phases
 
    # Report
-   displayTimings(timings)
+   displayTimings(timings, scaling, stats, invalid, memory)
+   if (phases):
+      displayPhases(phases)
+
+   # Save and compare, failing the run if anything regressed
+   if (EXPORT_FILE or COMPARE_FILE):
+      run = collectResults(timings, scaling, stats, invalid, memory)
+      if (EXPORT_FILE):
+         exportResults(EXPORT_FILE, run)
+      if (COMPARE_FILE):
+         try:
+            if (compareResults(COMPARE_FILE, run, THRESHOLD)>0):
+               exit(1)
+         except (OSError, ValueError, KeyError) as e:
+            print ("Cannot compare:", e)
+            exit(2)
 
 # end of Main
 
-# Run the program
-main()
+# Run the program.  The guard keeps pool workers on spawn-based platforms
+# from re-running main() when they import this module.
+if __name__ == "__main__":
+   main()
 
 
 